@@ -1,31 +1,88 @@
-from flask import Flask, request, jsonify
+import asyncio
+import json
+import os
+import sys
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+# Request timing and /metrics, shared by the backends in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from instrumentation import instrument, stage
+
+from batch import CONCURRENCY, MODEL, EventLoopThread, summarize_books, summary_messages
+from summary_cache import SummaryCache, summary_key
 
 # Initialize Flask app and OpenAI client
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-client = OpenAI(api_key="YOUR API KEY")  # Replace with your OpenAI API key
+instrument(app)
+if os.getenv("BOOKSHELF_FAKE_OPENAI") == "1":
+    # Offline runs and load tests: answers locally after BOOKSHELF_FAKE_LATENCY seconds
+    from fake_openai import AsyncFakeOpenAI, FakeOpenAI
+    client = FakeOpenAI(latency=float(os.getenv("BOOKSHELF_FAKE_LATENCY", "0")))
+    async_client = AsyncFakeOpenAI(latency=float(os.getenv("BOOKSHELF_FAKE_LATENCY", "0")))
+else:
+    client = OpenAI(api_key="YOUR API KEY")  # Replace with your OpenAI API key
+    # Batches retry rate-limited calls themselves (see batch.py)
+    async_client = AsyncOpenAI(api_key="YOUR API KEY", max_retries=0)
+
+# Summaries are kept in summaries.db, so each book is only summarized once
+cache = SummaryCache()
+
+# Batch summaries run on one event loop, sharing a limit of CONCURRENCY model calls at a time
+batch_loop = EventLoopThread()
+batch_slots = asyncio.Semaphore(CONCURRENCY)
+
+# Most books in one /summary/batch request
+MAX_BATCH_BOOKS = 1000
+
+
+@stage("llm_summary")
+def summarize(title, author, genre, model=MODEL):
+    # Use the new OpenAI client structure
+    completion = client.chat.completions.create(model=model, messages=summary_messages(title, author, genre))
+    # Accessing the message content properly
+    return completion.choices[0].message.content.strip()
+
+
 @app.route('/summary', methods=['POST'])
 def get_summary():
     data = request.json
-    prompt = f"Summarize the book '{data['title']}' by {data['author']} in brief. The genre is {data['genre']}."
 
     try:
-        # Use the new OpenAI client structure
-        completion = client.chat.completions.create(
-            model="gpt-4o",  # Use GPT-4o model
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that provides book summaries."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        # Accessing the message content properly
-        summary = completion.choices[0].message.content.strip()
+        key = summary_key(data['title'], data['author'], data['genre'], MODEL)
+        summary, _ = cache.get_or_create(key, lambda: summarize(data['title'], data['author'], data['genre']))
         return jsonify({"summary": summary})
     except Exception as e:
         print("Error:", e)  # Debugging: Log the error
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/summary/batch', methods=['POST'])
+def get_summary_batch():
+    """Summaries for {"books": [{"title", "author", "genre"}, ...]}, streamed as NDJSON.
+
+    Each line is one book's result (see `batch.summarize_books`), sent as soon as that
+    book is done, so the order differs from the request; use "index" to match them up.
+    """
+    data = request.get_json(silent=True)
+    books = data.get("books") if isinstance(data, dict) else None
+    if not isinstance(books, list) or not all(isinstance(book, dict) for book in books):
+        return jsonify({"error": "Expected {\"books\": [...]} with a title, author and genre per book"}), 400
+    if len(books) > MAX_BATCH_BOOKS:
+        return jsonify({"error": f"At most {MAX_BATCH_BOOKS} books per batch"}), 400
+
+    results = summarize_books(async_client, cache, books, model=MODEL, semaphore=batch_slots)
+    lines = (json.dumps(result) + "\n" for result in batch_loop.iterate(results))
+    return Response(lines, mimetype="application/x-ndjson", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/summary/stats', methods=['GET'])
+def get_summary_stats():
+    return jsonify(cache.stats())
+
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,155 @@
+"""Summarizing many books at once with the async OpenAI client.
+
+`summarize_books` summarizes a list (or any iterable) of books with at most
+`concurrency` model calls running at a time, and yields each result as soon as it
+is ready. Rate-limit (429) and transient errors are retried with exponential
+backoff, waiting at least as long as the API's retry-after header asks. Books
+already in the summary cache are answered from it without waiting for a slot.
+
+Used by the /summary/batch endpoint in backend.py and by prewarm.py.
+"""
+import asyncio
+import itertools
+import os
+import queue
+import random
+import sys
+import threading
+
+import openai
+
+# Stage timing shared by the backends in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from instrumentation import stage
+from summary_cache import summary_key
+
+MODEL = "gpt-4o"
+
+# Model calls running at once, per process
+CONCURRENCY = int(os.getenv("BOOKSHELF_CONCURRENCY", "8"))
+
+MAX_RETRIES = 6
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+SYSTEM_PROMPT = "You are a helpful assistant that provides book summaries."
+
+RETRYABLE = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def summary_messages(title, author, genre):
+    prompt = f"Summarize the book '{title}' by {author} in brief. The genre is {genre}."
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def retry_delay(error, attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Seconds to wait before retry number `attempt` (counting from 0) after `error`."""
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+    try:
+        if "retry-after-ms" in headers:
+            requested = float(headers["retry-after-ms"]) / 1000
+        else:
+            requested = float(headers["retry-after"])
+    except (KeyError, ValueError):
+        requested = None
+    backoff = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+    if requested is not None and 0 < requested <= max_delay:
+        # A little extra so clients told the same time do not all retry at once
+        return max(backoff, requested * random.uniform(1.0, 1.25))
+    return backoff
+
+
+@stage("llm_summary")
+async def create_summary(client, title, author, genre, model=MODEL, max_retries=MAX_RETRIES):
+    """Summarizes one book with an `AsyncOpenAI` client, retrying rate-limit and transient errors."""
+    for attempt in range(max_retries + 1):
+        try:
+            completion = await client.chat.completions.create(model=model, messages=summary_messages(title, author, genre))
+            return completion.choices[0].message.content.strip()
+        except RETRYABLE as error:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(retry_delay(error, attempt))
+
+
+async def summarize_books(client, cache, books, model=MODEL, concurrency=CONCURRENCY, max_retries=MAX_RETRIES,
+                          semaphore=None):
+    """Yields {"index", "title", "author", "summary", "source"} per book, in the order they finish.
+
+    `source` is where the summary came from, as in `SummaryCache.get_or_create`. A book
+    that could not be summarized gives {"index", "title", "author", "error"} instead.
+    Pass a shared `semaphore` to bound model calls across several batches. Books are
+    read from `books` as earlier ones finish, so long catalogs are not held in memory.
+    """
+    semaphore = semaphore or asyncio.Semaphore(concurrency)
+
+    async def summarize(index, book):
+        result = {"index": index, "title": book.get("title"), "author": book.get("author")}
+        try:
+            title, author, genre = book["title"], book["author"], book["genre"]
+
+            async def create():
+                async with semaphore:
+                    return await create_summary(client, title, author, genre, model, max_retries)
+
+            result["summary"], result["source"] = await cache.aget_or_create(summary_key(title, author, genre, model), create)
+        except KeyError as error:
+            result["error"] = f"Missing field {error}"
+        except Exception as error:
+            result["error"] = str(error)
+        return result
+
+    # Enough books in progress to keep every slot busy while cached ones are answered
+    window = max(1, concurrency) * 4
+    numbered = enumerate(books)
+    pending = set()
+    try:
+        while True:
+            for index, book in itertools.islice(numbered, window - len(pending)):
+                pending.add(asyncio.ensure_future(summarize(index, book)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class EventLoopThread:
+    """An asyncio event loop running in a daemon thread, for async code called from Flask's worker threads."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def iterate(self, async_iterable):
+        """Yields the items of `async_iterable`, iterated on the loop, in the calling thread.
+
+        Closing the generator (e.g. when the client disconnects) cancels the iteration.
+        """
+        items = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for item in async_iterable:
+                    items.put(item)
+            finally:
+                items.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item = items.get()
+                if item is finished:
+                    break
+                yield item
+            future.result()
+        finally:
+            future.cancel()
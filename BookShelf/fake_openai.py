@@ -0,0 +1,66 @@
+"""A local stand-in for the OpenAI client, for running the backend offline.
+
+Supports `client.chat.completions.create(model=..., messages=...)` and returns an
+object shaped like the real response, with a summary that repeats the request.
+`AsyncFakeOpenAI` is the same for `AsyncOpenAI`, and can answer with rate-limit
+errors like the real API. Start the backend with BOOKSHELF_FAKE_OPENAI=1 to use them.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+
+
+def _completion(model, messages):
+    message = SimpleNamespace(role="assistant", content=f"Summary: {messages[-1]['content']}")
+    return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+
+
+class FakeOpenAI:
+    """Counts the completions it is asked for in `calls`; each takes `latency` seconds."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def _create_completion(self, model, messages, **options):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return _completion(model, messages)
+
+
+class AsyncFakeOpenAI:
+    """Async fake; with `max_concurrent`, requests beyond that many at once get a 429.
+
+    Like the real API, the 429 carries a `retry-after` header (`retry_after` seconds).
+    `calls` counts answered requests and `rate_limited` the rejected ones.
+    """
+
+    def __init__(self, latency=0.0, max_concurrent=None, retry_after=0.1):
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.calls = 0
+        self.rate_limited = 0
+        self.active = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    async def _create_completion(self, model, messages, **options):
+        if self.max_concurrent is not None and self.active >= self.max_concurrent:
+            self.rate_limited += 1
+            # Only the parts of the HTTP response that the error and retry code read
+            request = SimpleNamespace(method="POST", url="https://api.openai.com/v1/chat/completions")
+            response = SimpleNamespace(status_code=429, headers={"retry-after": str(self.retry_after)}, request=request)
+            raise openai.RateLimitError("Rate limit reached", response=response, body=None)
+        self.active += 1
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        self.calls += 1
+        return _completion(model, messages)
@@ -0,0 +1,76 @@
+"""Fills the summary cache for a catalog of books ahead of traffic.
+
+The catalog is a CSV file with title, author and genre columns, a JSON Lines file
+with one {"title", "author", "genre"} object per line, or a JSON list of them (the
+shape the app keeps its books in). Books already in the cache are skipped, the rest
+are summarized in parallel with the same retry and backoff as /summary/batch.
+
+    python prewarm.py catalog.csv --concurrency 16
+
+Writes to the same summaries.db as the backend (SUMMARY_CACHE_PATH), so it can run
+while the backend is serving. Set BOOKSHELF_FAKE_OPENAI=1 to try it offline.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+
+from openai import AsyncOpenAI
+
+from batch import CONCURRENCY, MAX_RETRIES, MODEL, summarize_books
+from summary_cache import SummaryCache
+
+
+def read_catalog(path):
+    """Yields the books in the catalog at `path`, one at a time."""
+    with open(path, newline="", encoding="utf-8") as catalog:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(catalog)
+        elif path.endswith(".jsonl"):
+            for line in catalog:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(catalog)
+
+
+async def prewarm(client, cache, books, model, concurrency, max_retries):
+    counts = {"memory": 0, "disk": 0, "coalesced": 0, "model": 0, "error": 0}
+    started = time.perf_counter()
+    async for result in summarize_books(client, cache, books, model=model, concurrency=concurrency,
+                                        max_retries=max_retries):
+        counts[result.get("source", "error")] += 1
+        if "error" in result:
+            print(f"Failed: {result['title']!r} by {result['author']!r}: {result['error']}")
+        done = sum(counts.values())
+        if done % 100 == 0:
+            print(f"{done} books done, {counts['model']} summarized, {time.perf_counter() - started:.0f}s")
+    return counts, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize every book in a catalog into the summary cache.")
+    parser.add_argument("catalog", help=".csv, .jsonl or .json file of books with title, author and genre")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="model calls running at once")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--model", default=MODEL)
+    args = parser.parse_args()
+
+    if os.getenv("BOOKSHELF_FAKE_OPENAI") == "1":
+        from fake_openai import AsyncFakeOpenAI
+        client = AsyncFakeOpenAI(latency=float(os.getenv("BOOKSHELF_FAKE_LATENCY", "0")))
+    else:
+        # Reads OPENAI_API_KEY; rate-limited calls are retried by summarize_books
+        client = AsyncOpenAI(max_retries=0)
+
+    counts, seconds = asyncio.run(prewarm(client, SummaryCache(), read_catalog(args.catalog), args.model,
+                                          args.concurrency, args.max_retries))
+    cached = counts["memory"] + counts["disk"] + counts["coalesced"]
+    print(f"{sum(counts.values())} books in {seconds:.1f}s: {counts['model']} summarized, "
+          f"{cached} already cached, {counts['error']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Cache of book summaries by normalized (title, author, genre, model).
+
+Summaries are stored in SQLite, so they survive restarts, with an in-memory LRU in
+front for the most requested books. When several requests ask for the same
+uncached book at once, only the first one calls the model; the others wait for its
+result. Hit rates and latencies are available from `stats()`.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "summaries.db"))
+SUMMARY_TTL = int(os.getenv("SUMMARY_TTL", str(30 * 24 * 3600)))
+MEMORY_ENTRIES = int(os.getenv("SUMMARY_MEMORY_ENTRIES", "2048"))
+
+# Latency samples kept per outcome for the percentiles in stats()
+LATENCY_SAMPLES = 1000
+
+
+def normalize(value):
+    return re.sub(r"\s+", " ", str(value or "")).strip().lower()
+
+
+def summary_key(title, author, genre, model):
+    return "\x1f".join(normalize(value) for value in (title, author, genre, model))
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SummaryCache:
+    """Memory LRU + SQLite store with request coalescing.
+
+    `get_or_create(key, create)` returns (summary, source), where source is "memory",
+    "disk", "coalesced" (waited for a concurrent request) or "model" (`create()` was
+    called). Failed calls are not cached; their error is raised to every waiter.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=SUMMARY_TTL, memory_entries=MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()  # key -> (summary, created)
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.counts = {"memory": 0, "disk": 0, "coalesced": 0, "model": 0, "error": 0}
+        self.latencies = {source: deque(maxlen=LATENCY_SAMPLES) for source in self.counts}
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        # SQLite connections cannot be shared between threads; keep one per thread
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def _remember(self, key, summary, created):
+        with self.lock:
+            self.memory[key] = (summary, created)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def _record(self, source, started):
+        with self.lock:
+            self.counts[source] += 1
+            self.latencies[source].append(time.perf_counter() - started)
+
+    def _from_memory(self, key):
+        # Called with self.lock held
+        entry = self.memory.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > self.ttl:
+            del self.memory[key]
+            return None
+        self.memory.move_to_end(key)
+        return entry[0]
+
+    def get(self, key):
+        """Returns (summary, source) from memory or disk, or (None, None)."""
+        with self.lock:
+            summary = self._from_memory(key)
+        if summary is not None:
+            return summary, "memory"
+        row = self._connection().execute("SELECT summary, created FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is not None and time.time() - row[1] <= self.ttl:
+            self._remember(key, row[0], row[1])
+            return row[0], "disk"
+        return None, None
+
+    def set(self, key, summary):
+        created = time.time()
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (key, summary, created))
+        self._remember(key, summary, created)
+
+    def _claim(self, key):
+        """Returns (summary, future, leader) for a `key` that `get` missed.
+
+        `summary` is set if a leader stored it since that miss. Otherwise `future` is the
+        in-flight future for `key`, and `leader` tells whether this caller must fill it.
+        """
+        with self.lock:
+            # A leader stores the summary before it leaves in_flight, so this check and
+            # the in_flight lookup together cannot miss a finished call
+            summary = self._from_memory(key)
+            if summary is not None:
+                return summary, None, False
+            future = self.in_flight.get(key)
+            if future is not None:
+                return None, future, False
+            future = self.in_flight[key] = Future()
+            return None, future, True
+
+    def _settle(self, key, future, summary=None, error=None):
+        try:
+            if error is None:
+                self.set(key, summary)
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            if error is None:
+                future.set_result(summary)
+            else:
+                future.set_exception(error)
+
+    def get_or_create(self, key, create):
+        started = time.perf_counter()
+        summary, source = self.get(key)
+        if summary is not None:
+            self._record(source, started)
+            return summary, source
+
+        summary, future, leader = self._claim(key)
+        if summary is not None:
+            self._record("memory", started)
+            return summary, "memory"
+        try:
+            if leader:
+                try:
+                    summary = create()
+                except Exception as error:
+                    self._settle(key, future, error=error)
+                    raise
+                self._settle(key, future, summary)
+            else:
+                summary = future.result()
+        except Exception:
+            self._record("error", started)
+            raise
+        source = "model" if leader else "coalesced"
+        self._record(source, started)
+        return summary, source
+
+    async def aget_or_create(self, key, create):
+        """`get_or_create` for asyncio code: `create` is a coroutine function.
+
+        Shares its in-flight requests with `get_or_create`, so a book being summarized
+        for a batch is not summarized again for a single request, or the other way round.
+        SQLite is read and written on worker threads, so the event loop never waits on disk.
+        """
+        started = time.perf_counter()
+        summary, source = await asyncio.to_thread(self.get, key)
+        if summary is not None:
+            self._record(source, started)
+            return summary, source
+
+        summary, future, leader = self._claim(key)
+        if summary is not None:
+            self._record("memory", started)
+            return summary, "memory"
+        try:
+            if leader:
+                try:
+                    summary = await create()
+                except BaseException as error:
+                    # Cancelled batches must release the key too, or later requests would wait forever
+                    # Without a summary nothing is written, so this does not block
+                    self._settle(key, future, error=error if isinstance(error, Exception) else RuntimeError("cancelled"))
+                    raise
+                await asyncio.to_thread(self._settle, key, future, summary)
+            else:
+                summary = await asyncio.wrap_future(future)
+        except Exception:
+            self._record("error", started)
+            raise
+        source = "model" if leader else "coalesced"
+        self._record(source, started)
+        return summary, source
+
+    def stats(self):
+        """Request counts by source, hit rate, and latency percentiles in milliseconds."""
+        with self.lock:
+            counts = dict(self.counts)
+            latencies = {source: list(samples) for source, samples in self.latencies.items()}
+            memory_entries = len(self.memory)
+            in_flight = len(self.in_flight)
+        requests = sum(counts.values())
+        hits = counts["memory"] + counts["disk"] + counts["coalesced"]
+        stored = self._connection().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {
+            "requests": requests,
+            "counts": counts,
+            "hit_rate": hits / requests if requests else None,
+            "latency_ms": {
+                source: {
+                    "p50": _percentile(samples, 0.5) * 1000 if samples else None,
+                    "p95": _percentile(samples, 0.95) * 1000 if samples else None,
+                }
+                for source, samples in latencies.items()
+            },
+            "memory_entries": memory_entries,
+            "stored_summaries": stored,
+            "in_flight": in_flight,
+        }
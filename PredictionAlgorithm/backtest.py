@@ -0,0 +1,148 @@
+"""Walk-forward evaluation of the reversal model, with trained models cached on disk.
+
+The labeled rows are split in time order: each fold trains on rows before its test
+block (all of them for an "expanding" window, the most recent `window` rows for a
+"rolling" one) and predicts the test block. Folds train in parallel in a process pool.
+
+Each fitted model is saved under MODEL_DIR, named by a hash of its training data range
+and contents, the indicator parameters, the reversal threshold and the hyperparameters.
+Re-running an evaluation with the same inputs loads the models instead of training.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+
+from reversal_model import make_model, xy
+
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+
+Fold = namedtuple('Fold', ['number', 'train_start', 'train_end', 'test_start', 'test_end'])
+BacktestResult = namedtuple('BacktestResult', ['folds', 'predictions', 'train_seconds', 'predict_seconds'])
+
+
+def walk_forward_folds(n_rows, n_folds=5, mode='expanding', window=None, min_train_fraction=0.3):
+    """Returns Folds of row positions ([start, end) ranges) covering the rows after the first training block."""
+    if mode not in ('expanding', 'rolling'):
+        raise ValueError("mode must be 'expanding' or 'rolling'")
+    first_test = int(n_rows * min_train_fraction)
+    bounds = np.linspace(first_test, n_rows, n_folds + 1).astype(int)
+    window = window or first_test
+    folds = []
+    for number, (test_start, test_end) in enumerate(zip(bounds[:-1], bounds[1:]), 1):
+        train_start = 0 if mode == 'expanding' else max(0, test_start - window)
+        if test_end > test_start and test_start > train_start:
+            folds.append(Fold(number, train_start, int(test_start), int(test_start), int(test_end)))
+    return folds
+
+
+def model_key(data_id, train, indicator_params, threshold, model_params):
+    """Hash identifying a fitted model by everything that determines it."""
+    X_train, y_train = xy(train)
+    content = hashlib.sha256(np.ascontiguousarray(X_train.to_numpy()).tobytes())
+    content.update(np.ascontiguousarray(y_train.to_numpy()).tobytes())
+    description = {
+        'data': data_id,
+        'range': [str(train['Date'].iloc[0]), str(train['Date'].iloc[-1]), len(train)],
+        'content': content.hexdigest(),
+        'indicators': indicator_params,
+        'threshold': threshold,
+        'model': model_params,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _train(X_train, y_train, model_params, path):
+    started = time.perf_counter()
+    model = make_model(n_jobs=1, **model_params)
+    model.fit(X_train, y_train)
+    seconds = time.perf_counter() - started
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A unique temporary name, so concurrent trainings of the same fold never share a file
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            joblib.dump(model, temp_file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return model, seconds
+
+
+def walk_forward(data, indicator_params, threshold, model_params=None, n_folds=5, mode='expanding',
+                 window=None, data_id='', workers=None, model_dir=MODEL_DIR):
+    """Runs a walk-forward evaluation over the labeled frame `data` (see reversal_model.build_dataset).
+
+    Returns a BacktestResult with a per-fold metrics table, the out-of-sample predictions
+    (indexed like `data`), and total training and inference time in seconds.
+    """
+    model_params = model_params or {}
+    folds = walk_forward_folds(len(data), n_folds, mode, window)
+
+    models = {}
+    cached = {}
+    pending = {}
+    for fold in folds:
+        train = data.iloc[fold.train_start:fold.train_end]
+        path = os.path.join(model_dir, model_key(data_id, train, indicator_params, threshold, model_params) + '.joblib')
+        if os.path.exists(path):
+            models[fold.number] = (joblib.load(path), 0.0)
+            cached[fold.number] = True
+        else:
+            pending[fold.number] = (train, path)
+            cached[fold.number] = False
+
+    if pending and workers == 1:
+        # In-process, e.g. when the caller already runs one evaluation per worker process
+        for number, (train, path) in pending.items():
+            models[number] = _train(*xy(train), model_params, path)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=min(len(pending), workers or os.cpu_count())) as executor:
+            futures = {
+                number: executor.submit(_train, *xy(train), model_params, path)
+                for number, (train, path) in pending.items()
+            }
+            for number, future in futures.items():
+                models[number] = future.result()
+
+    rows = []
+    predictions = []
+    for fold in folds:
+        test = data.iloc[fold.test_start:fold.test_end]
+        X_test, y_test = xy(test)
+        model, train_seconds = models[fold.number]
+        started = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_seconds = time.perf_counter() - started
+        predictions.append(pd.Series(y_pred, index=test.index))
+        rows.append({
+            'fold': fold.number,
+            'train_from': data['Date'].iloc[fold.train_start].date(),
+            'train_to': data['Date'].iloc[fold.train_end - 1].date(),
+            'test_from': data['Date'].iloc[fold.test_start].date(),
+            'test_to': data['Date'].iloc[fold.test_end - 1].date(),
+            'train_rows': fold.train_end - fold.train_start,
+            'test_rows': fold.test_end - fold.test_start,
+            'accuracy': accuracy_score(y_test, y_pred),
+            'macro_f1': f1_score(y_test, y_pred, average='macro', zero_division=0),
+            'cached_model': cached[fold.number],
+            'train_seconds': train_seconds,
+            'predict_seconds': predict_seconds,
+        })
+
+    table = pd.DataFrame(rows)
+    return BacktestResult(
+        folds=table,
+        predictions=pd.concat(predictions) if predictions else pd.Series(dtype=int),
+        train_seconds=float(table['train_seconds'].sum()) if rows else 0.0,
+        predict_seconds=float(table['predict_seconds'].sum()) if rows else 0.0,
+    )
@@ -0,0 +1,138 @@
+"""Fast rendering of the trend reversal chart.
+
+The price line is decimated to the chart's pixel width, keeping the minimum and the
+maximum of every pixel column, so a spike is never lost however long the history is.
+The figure is drawn in two layers: the base (price line, axes, labels, grid) is
+rendered once and kept as a pixel buffer, and the reversal markers and legend are
+blitted on top of it. A rerun that only changes marker settings redraws only the
+markers; a rerun that changes nothing reuses the last image.
+"""
+import hashlib
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def decimate_minmax(x, y, buckets):
+    """Returns (x, y) reduced to the minimum and maximum point of each of `buckets` equal slices.
+
+    The points keep their original order. Series shorter than two points per bucket
+    are returned unchanged.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if buckets < 1 or n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    padded = np.full(size * buckets, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    rows = ~np.all(np.isnan(padded), axis=1)
+    padded = padded[rows]
+    offsets = np.flatnonzero(rows) * size
+    # The minimum and maximum of each bucket, in their original order
+    keep = np.stack([offsets + np.nanargmin(padded, axis=1), offsets + np.nanargmax(padded, axis=1)], axis=1)
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+def _style(name):
+    # matplotlib 3.6 renamed the bundled seaborn styles to seaborn-v0_8*
+    if name not in plt.style.available and f'{name}-v0_8' in plt.style.available:
+        return f'{name}-v0_8'
+    return name
+
+
+def _fingerprint(*values):
+    digest = hashlib.sha1()
+    for value in values:
+        if isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ReversalChart:
+    """Renders the price chart with actual and predicted reversal markers to an RGBA array.
+
+    Keep one instance per user session (e.g. in `st.session_state`): it holds the
+    matplotlib figure and the cached layers, which must not be shared across threads.
+    """
+
+    def __init__(self, width=1400, height=800, dpi=100):
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self._base_key = None
+        self._overlay_key = None
+        self._image = None
+
+    def _build_base(self, dates, close, symbol, plot_style, price_color, line_width, alpha, y_axis_scale):
+        x, y = decimate_minmax(mdates.date2num(dates), close, self.width)
+        with plt.style.context(_style(plot_style)):
+            figure = Figure(figsize=(self.width / self.dpi, self.height / self.dpi), dpi=self.dpi)
+            canvas = FigureCanvasAgg(figure)
+            ax = figure.add_subplot()
+            self._line, = ax.plot(x, y, label=f'{symbol} Close Price', color=price_color,
+                                  linewidth=line_width, alpha=alpha)
+            ax.xaxis_date()
+            # Markers are drawn on top of the cached base, never into it
+            self._actual = ax.scatter([], [], marker='o', label='Actual Reversal', animated=True)
+            self._predicted = ax.scatter([], [], marker='x', label='Predicted Reversal', animated=True)
+            ax.set_yscale(y_axis_scale)
+            ax.set_title(f'{symbol} Trend Reversal Analysis', pad=20)
+            ax.set_xlabel('Date')
+            ax.set_ylabel('Price')
+            for label in ax.get_xticklabels():
+                label.set_rotation(45)
+            ax.grid(True, alpha=0.3)
+            figure.tight_layout()
+            canvas.draw()
+        self._figure, self._canvas, self._ax = figure, canvas, ax
+        self._background = canvas.copy_from_bbox(figure.bbox)
+
+    def _marker_offsets(self, dates, prices):
+        """Data coordinates of the markers, keeping one marker per pixel."""
+        points = np.column_stack([mdates.date2num(dates), np.asarray(prices, dtype=np.float64)])
+        if len(points) == 0:
+            return np.empty((0, 2))
+        pixels = np.round(self._ax.transData.transform(points))
+        _, first = np.unique(pixels, axis=0, return_index=True)
+        return points[np.sort(first)]
+
+    def render(self, dates, close, actual_dates, actual_prices, predicted_dates, predicted_prices,
+               symbol='', plot_style='default', price_color='blue', actual_color='green', predicted_color='red',
+               marker_size=100, line_width=2, alpha=0.6, y_axis_scale='linear'):
+        """Returns the chart as an (height, width, 4) uint8 array, redrawing only the layers that changed."""
+        base_key = _fingerprint(np.asarray(dates), np.asarray(close), symbol, plot_style, price_color,
+                                line_width, alpha, y_axis_scale)
+        if base_key != self._base_key:
+            self._build_base(np.asarray(dates), close, symbol, plot_style, price_color, line_width, alpha, y_axis_scale)
+            self._base_key = base_key
+            self._overlay_key = None
+
+        overlay_key = _fingerprint(np.asarray(actual_dates), np.asarray(actual_prices), np.asarray(predicted_dates),
+                                   np.asarray(predicted_prices), actual_color, predicted_color, marker_size, alpha)
+        if overlay_key != self._overlay_key:
+            with plt.style.context(_style(plot_style)):
+                for markers, marker_dates, prices, color in ((self._actual, actual_dates, actual_prices, actual_color),
+                                                             (self._predicted, predicted_dates, predicted_prices, predicted_color)):
+                    markers.set_offsets(self._marker_offsets(np.asarray(marker_dates), prices))
+                    markers.set_color(color)
+                    markers.set_sizes([marker_size])
+                    markers.set_alpha(alpha)
+                # The legend shows the marker colors, so it belongs to the overlay
+                legend = self._ax.legend(handles=[self._line, self._actual, self._predicted], loc='upper left')
+                legend.set_animated(True)
+                self._canvas.restore_region(self._background)
+                self._ax.draw_artist(self._actual)
+                self._ax.draw_artist(self._predicted)
+                self._ax.draw_artist(legend)
+            self._image = np.asarray(self._canvas.buffer_rgba()).copy()
+            self._overlay_key = overlay_key
+        return self._image
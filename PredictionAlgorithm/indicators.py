@@ -0,0 +1,248 @@
+"""Technical indicators as vectorized NumPy kernels, plus a memoizing, incremental engine.
+
+Every kernel takes a 1-D array (one series) or a 2-D array (one series per column) and
+works along axis 0, so the same code serves a single symbol or a whole panel. Results
+match the pandas formulas the app used before (`rolling(...).mean()/.std()` and
+`ewm(span=..., adjust=False)`).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+FEATURE_COLUMNS = ['RSI', 'MACD', 'Signal_Line', 'SMA', 'Upper_Band', 'Lower_Band', 'Standard_Deviation']
+
+# Window of the volatility feature (Standard_Deviation), independent of the Bollinger period
+VOLATILITY_PERIOD = 20
+
+DEFAULT_PARAMS = {
+    'rsi_period': 14,
+    'macd_short_period': 12,
+    'macd_long_period': 26,
+    'macd_signal_period': 9,
+    'bollinger_period': 20,
+    'bollinger_std_dev': 2,
+}
+
+
+def _rolling(values, period, reduce):
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        windows = sliding_window_view(values, period, axis=0)
+        result[period - 1:] = reduce(windows, axis=-1)
+    return result
+
+
+def rolling_mean(values, period):
+    return _rolling(values, period, np.mean)
+
+
+def rolling_std(values, period):
+    return _rolling(values, period, lambda windows, axis: np.std(windows, axis=axis, ddof=1))
+
+
+def ema(values, span, initial=None):
+    """Exponential moving average with pandas' `adjust=False` recursion.
+
+    `initial` is the EMA value just before `values` starts, which lets a series be
+    continued bar by bar. Leading NaNs (a panel column that starts later) stay NaN and
+    the average starts at the first valid value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    alpha = 2.0 / (span + 1.0)
+    if len(values) == 0:
+        return values.copy()
+    valid = ~np.isnan(values)
+    leading = ~valid & (np.cumsum(valid, axis=0) == 0)
+    if initial is None:
+        # Start each column at its first valid value (y[0] = x[0])
+        first_valid = np.argmax(valid, axis=0)
+        initial = np.take_along_axis(values, first_valid[np.newaxis, ...], axis=0)[0]
+    filled = np.where(leading, initial, values)
+    state = (1.0 - alpha) * np.asarray(initial, dtype=np.float64)
+    result, _ = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=state[np.newaxis, ...])
+    result[leading] = np.nan
+    return result
+
+
+def rsi(close, period):
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.full(close.shape, np.nan)
+    delta[1:] = np.diff(close, axis=0)
+    # NaN deltas count as 0, like `delta.where(delta > 0, 0)`, except before a column's
+    # first price (a panel column that starts later), where the RSI stays NaN
+    leading = np.cumsum(~np.isnan(close), axis=0) == 0
+    gain = np.where(leading, np.nan, np.where(delta > 0, delta, 0.0))
+    loss = np.where(leading, np.nan, np.where(delta < 0, -delta, 0.0))
+    gain = rolling_mean(gain, period)
+    loss = rolling_mean(loss, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def macd(close, short_period, long_period, signal_period):
+    short_ema = ema(close, short_period)
+    long_ema = ema(close, long_period)
+    line = short_ema - long_ema
+    return line, ema(line, signal_period)
+
+
+def bollinger_bands(close, period, num_std_dev):
+    sma = rolling_mean(close, period)
+    std = rolling_std(close, period)
+    return sma, sma + std * num_std_dev, sma - std * num_std_dev
+
+
+def panel_features(close, rsi_period, macd_short_period, macd_long_period, macd_signal_period,
+                   bollinger_period, bollinger_std_dev):
+    """Returns {column: array} for the FEATURE_COLUMNS of every series in `close` at once.
+
+    `close` is 1-D or 2-D (bars x symbols). Columns of different lengths are aligned at
+    their last bar and padded with leading NaNs.
+    """
+    macd_line, signal_line = macd(close, macd_short_period, macd_long_period, macd_signal_period)
+    sma, upper_band, lower_band = bollinger_bands(close, bollinger_period, bollinger_std_dev)
+    return {
+        'RSI': rsi(close, rsi_period),
+        'MACD': macd_line,
+        'Signal_Line': signal_line,
+        'SMA': sma,
+        'Upper_Band': upper_band,
+        'Lower_Band': lower_band,
+        'Standard_Deviation': rolling_std(close, VOLATILITY_PERIOD),
+    }
+
+
+# Memoized building blocks. `compute(close, *params)` returns a dict of arrays over the
+# full history; `update(close, start, previous, *params)` returns the values for the
+# bars from `start` on, reading only the few bars of history each one depends on.
+def _rolling_update(kernel, lookback):
+    def update(close, start, previous, period):
+        tail_start = max(0, start - lookback(period))
+        values = kernel(close[tail_start:], period)
+        return {'values': values[start - tail_start:]}
+    return update
+
+
+def _macd_compute(close, short_period, long_period, signal_period):
+    short_ema = ema(close, short_period)
+    long_ema = ema(close, long_period)
+    line = short_ema - long_ema
+    return {'short_ema': short_ema, 'long_ema': long_ema, 'macd': line, 'signal': ema(line, signal_period)}
+
+
+def _macd_update(close, start, previous, short_period, long_period, signal_period):
+    new = close[start:]
+    short_ema = ema(new, short_period, initial=previous['short_ema'][-1])
+    long_ema = ema(new, long_period, initial=previous['long_ema'][-1])
+    line = short_ema - long_ema
+    return {'short_ema': short_ema, 'long_ema': long_ema, 'macd': line,
+            'signal': ema(line, signal_period, initial=previous['signal'][-1])}
+
+
+INDICATORS = {
+    'rsi': (lambda close, period: {'values': rsi(close, period)},
+            _rolling_update(rsi, lambda period: period)),
+    'sma': (lambda close, period: {'values': rolling_mean(close, period)},
+            _rolling_update(rolling_mean, lambda period: period - 1)),
+    'std': (lambda close, period: {'values': rolling_std(close, period)},
+            _rolling_update(rolling_std, lambda period: period - 1)),
+    'macd': (_macd_compute, _macd_update),
+}
+
+
+def feature_keys(rsi_period, macd_short_period, macd_long_period, macd_signal_period,
+                 bollinger_period, bollinger_std_dev):
+    """The (indicator, *params) results `IndicatorEngine.features` reads for these parameters."""
+    return [('rsi', rsi_period), ('macd', macd_short_period, macd_long_period, macd_signal_period),
+            ('sma', bollinger_period), ('std', bollinger_period), ('std', VOLATILITY_PERIOD)]
+
+
+class IndicatorEngine:
+    """Computes indicators over one price history, memoizing each (indicator, parameters) result.
+
+    Results are kept in an LRU of `max_entries` entries, so moving one slider only
+    computes the indicator that slider controls. `append` extends the history and
+    brings every cached result up to date in time proportional to the new bars only.
+    The price frame given to the engine is copied and never modified.
+    """
+
+    def __init__(self, prices, max_entries=64):
+        self.prices = prices.reset_index(drop=True).copy()
+        self.close = self.prices['Close'].to_numpy(dtype=np.float64)
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.close)
+
+    def __getstate__(self):
+        # Locks cannot be pickled; an engine sent to a worker process gets a new one
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def get(self, name, *params):
+        """Returns the arrays of indicator `name` for `params`, computing them only on a cache miss."""
+        key = (name,) + params
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+            compute, _ = INDICATORS[name]
+            result = compute(self.close, *params)
+            for values in result.values():
+                values.flags.writeable = False
+            self.cache[key] = result
+            if len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+            return result
+
+    def append(self, new_bars):
+        """Adds bars newer than the current history and updates every cached indicator."""
+        new_bars = new_bars.reset_index(drop=True)
+        if new_bars.empty:
+            return
+        with self.lock:
+            if len(self.prices) and new_bars['Date'].iloc[0] <= self.prices['Date'].iloc[-1]:
+                raise ValueError("Appended bars must be newer than the last bar in the engine")
+            start = len(self.close)
+            self.prices = pd.concat([self.prices, new_bars[self.prices.columns]], ignore_index=True)
+            self.close = self.prices['Close'].to_numpy(dtype=np.float64)
+            for key, previous in self.cache.items():
+                name, params = key[0], key[1:]
+                _, update = INDICATORS[name]
+                new_values = update(self.close, start, previous, *params)
+                updated = {field: np.concatenate([previous[field], new_values[field]]) for field in previous}
+                for values in updated.values():
+                    values.flags.writeable = False
+                self.cache[key] = updated
+
+    def features(self, rsi_period, macd_short_period, macd_long_period, macd_signal_period,
+                 bollinger_period, bollinger_std_dev):
+        """Returns a new frame: the price history plus the FEATURE_COLUMNS for these parameters."""
+        macd_result = self.get('macd', macd_short_period, macd_long_period, macd_signal_period)
+        sma = self.get('sma', bollinger_period)['values']
+        std = self.get('std', bollinger_period)['values']
+        features = self.prices.copy()
+        features['RSI'] = self.get('rsi', rsi_period)['values']
+        features['MACD'] = macd_result['macd']
+        features['Signal_Line'] = macd_result['signal']
+        features['SMA'] = sma
+        features['Upper_Band'] = sma + std * bollinger_std_dev
+        features['Lower_Band'] = sma - std * bollinger_std_dev
+        features['Standard_Deviation'] = self.get('std', VOLATILITY_PERIOD)['values']
+        return features
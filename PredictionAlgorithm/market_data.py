@@ -0,0 +1,170 @@
+"""Local on-disk store for daily (or intraday) price history.
+
+Each (symbol, interval) pair is kept as a NumPy structured array in a `.npy` file,
+opened memory-mapped, plus a small JSON file recording which date range has already
+been fetched. Loading a range only downloads the dates outside that coverage and
+appends them, so a cold start reads from disk instead of Yahoo Finance.
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.getenv("MARKET_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_data"))
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+RECORD_DTYPE = np.dtype([('Date', '<i8')] + [(column, '<f8') for column in PRICE_COLUMNS])
+
+
+def download_from_yahoo(symbol, start, end, interval):
+    """Downloads [start, end) from Yahoo Finance as a frame with Date and PRICE_COLUMNS."""
+    import yfinance as yf
+
+    data = yf.download(symbol, start=start, end=end, interval=interval, progress=False)
+    if isinstance(data.columns, pd.MultiIndex):
+        # Newer yfinance versions return (field, ticker) columns even for a single ticker
+        data.columns = data.columns.get_level_values(0)
+    data = data.reset_index().rename(columns={'Datetime': 'Date'})
+    return data[['Date'] + PRICE_COLUMNS]
+
+
+def _to_timestamp(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp
+
+
+def _replace(path, write):
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            write(temp_file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _to_records(frame):
+    dates = pd.to_datetime(frame['Date'])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    records = np.empty(len(frame), dtype=RECORD_DTYPE)
+    records['Date'] = dates.values.astype('datetime64[ns]').astype('<i8')
+    for column in PRICE_COLUMNS:
+        records[column] = frame[column].to_numpy(dtype=np.float64)
+    return records
+
+
+def _to_frame(records):
+    frame = pd.DataFrame({column: records[column] for column in PRICE_COLUMNS})
+    frame.insert(0, 'Date', pd.to_datetime(records['Date']))
+    return frame
+
+
+class MarketDataStore:
+    """Price history cache keyed by symbol and interval.
+
+    `fetch(symbol, start, end, interval)` supplies missing data and defaults to Yahoo
+    Finance. With `offline=True` nothing is fetched and only stored data is returned,
+    which is how tests run from a fixture imported with `import_csv`.
+    """
+
+    def __init__(self, root=DATA_DIR, fetch=download_from_yahoo, offline=False):
+        self.root = root
+        self.fetch = fetch
+        self.offline = offline
+
+    def _base_path(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.root, f"{safe_symbol}_{interval}")
+
+    def read(self, symbol, interval='1d'):
+        """Returns (records, coverage) for a stored series, or (None, None). Records are memory-mapped."""
+        base = self._base_path(symbol, interval)
+        try:
+            with open(base + '.json') as meta_file:
+                coverage = json.load(meta_file)
+            records = np.load(base + '.npy', mmap_mode='r')
+        except (OSError, ValueError):
+            return None, None
+        return records, coverage
+
+    def write(self, symbol, interval, records, coverage):
+        """Replaces the stored series. Each file is written under a temporary name, then renamed."""
+        os.makedirs(self.root, exist_ok=True)
+        base = self._base_path(symbol, interval)
+        _replace(base + '.npy', lambda data_file: np.save(data_file, records))
+        _replace(base + '.json', lambda meta_file: meta_file.write(json.dumps(coverage).encode('utf-8')))
+
+    def import_csv(self, symbol, path, interval='1d'):
+        """Seeds the store from a CSV with Date and PRICE_COLUMNS, e.g. a test fixture."""
+        frame = pd.read_csv(path, parse_dates=['Date'])
+        records = _to_records(frame)
+        records.sort(order='Date')
+        dates = pd.to_datetime(records['Date'])
+        coverage = {'start': str(dates[0]), 'end': str(dates[-1] + pd.Timedelta(days=1))} if len(records) else None
+        self.write(symbol, interval, records, coverage)
+
+    def load(self, symbol, start, end, interval='1d'):
+        """Returns [start, end) for `symbol` as a frame with Date and PRICE_COLUMNS.
+
+        Only the parts of the range not yet covered by the store are fetched; they are
+        merged into the stored series before the range is returned.
+        """
+        start, end = _to_timestamp(start), _to_timestamp(end)
+        records, coverage = self.read(symbol, interval)
+
+        if not self.offline:
+            # Never mark the future (or today's unfinished bar) as covered
+            fetch_end = min(end, pd.Timestamp.now().normalize())
+            if coverage is None:
+                missing = [(start, fetch_end)]
+            else:
+                # Extend the covered range on either side, so it always stays one contiguous range
+                covered_start, covered_end = _to_timestamp(coverage['start']), _to_timestamp(coverage['end'])
+                missing = [(start, covered_start), (covered_end, fetch_end)]
+            missing = [(range_start, range_end) for range_start, range_end in missing if range_start < range_end]
+
+            if missing:
+                parts = [] if records is None else [np.asarray(records)]
+                for range_start, range_end in missing:
+                    fetched = self.fetch(symbol, range_start.strftime('%Y-%m-%d'), range_end.strftime('%Y-%m-%d'), interval)
+                    parts.append(_to_records(fetched.dropna(subset=['Close'])))
+                records = np.concatenate(parts)
+                # Keep the most recently fetched copy of any date that was downloaded twice
+                _, last = np.unique(records['Date'][::-1], return_index=True)
+                records = records[::-1][last]
+                covered = [start, fetch_end] if coverage is None else [covered_start, covered_end, start, fetch_end]
+                coverage = {'start': str(min(covered)), 'end': str(max(covered))}
+                self.write(symbol, interval, records, coverage)
+
+        if records is None:
+            return _to_frame(np.empty(0, dtype=RECORD_DTYPE))
+        dates = records['Date']
+        lower = np.searchsorted(dates, start.value, side='left')
+        upper = np.searchsorted(dates, end.value, side='left')
+        return _to_frame(records[lower:upper])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch price history into the local market data store.")
+    parser.add_argument('symbols', nargs='+', help="ticker symbols, e.g. ^GSPC AAPL")
+    parser.add_argument('--start', default='2000-01-01')
+    parser.add_argument('--end', default=pd.Timestamp.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--interval', default='1d')
+    args = parser.parse_args()
+
+    store = MarketDataStore()
+    for symbol in args.symbols:
+        data = store.load(symbol, args.start, args.end, args.interval)
+        print(f"{symbol}: {len(data)} bars stored in {store.root}")
+
+
+if __name__ == '__main__':
+    main()
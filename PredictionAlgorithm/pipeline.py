@@ -0,0 +1,221 @@
+"""Headless trend reversal pipeline: load prices, compute indicators, label, train and predict.
+
+The Streamlit app uses it for one symbol at a time; the command line scores a whole
+universe. Indicators for all symbols are computed together on a (bars x symbols)
+panel, then every symbol is evaluated walk-forward (see backtest.py) in a process
+pool, and its out-of-sample predictions are appended to a CSV or Parquet file as
+soon as that symbol finishes.
+
+    python pipeline.py AAPL MSFT ^GSPC --out predictions.csv
+    python pipeline.py --symbols-file sp500.txt --out predictions.parquet --workers 16
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backtest import walk_forward
+from indicators import DEFAULT_PARAMS, FEATURE_COLUMNS, panel_features
+from market_data import MarketDataStore
+from reversal_model import DEFAULT_THRESHOLD, label_trend_reversals
+
+DEFAULT_START = '2000-01-01'
+DEFAULT_END = '2023-01-01'
+
+# Symbols with fewer labeled rows than this are reported and skipped
+MIN_ROWS = 100
+
+PREDICTION_COLUMNS = ['Symbol', 'Date', 'Close', 'Reversal', 'Prediction']
+
+
+def load_prices(symbols, start=DEFAULT_START, end=DEFAULT_END, interval='1d', store=None, max_workers=8):
+    """Returns {symbol: price frame}, loading the symbols from the market data store in parallel."""
+    store = store or MarketDataStore()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = executor.map(lambda symbol: store.load(symbol, start, end, interval), symbols)
+        return dict(zip(symbols, frames))
+
+
+def label_panel(prices, indicator_params, threshold):
+    """Returns {symbol: labeled feature frame} like reversal_model.build_dataset, for many symbols.
+
+    The close prices are stacked into one (bars x symbols) array, aligned at each
+    symbol's last bar, so every indicator is computed once for the whole panel.
+    """
+    symbols = [symbol for symbol, frame in prices.items() if len(frame)]
+    lengths = [len(prices[symbol]) for symbol in symbols]
+    n_bars = max(lengths, default=0)
+    close = np.full((n_bars, len(symbols)), np.nan)
+    for column, (symbol, length) in enumerate(zip(symbols, lengths)):
+        close[n_bars - length:, column] = prices[symbol]['Close'].to_numpy(dtype=np.float64)
+
+    features = panel_features(close, **indicator_params)
+    datasets = {}
+    for column, (symbol, length) in enumerate(zip(symbols, lengths)):
+        data = prices[symbol].reset_index(drop=True)
+        for name in FEATURE_COLUMNS:
+            data[name] = features[name][n_bars - length:, column]
+        data = label_trend_reversals(data, threshold)
+        data.dropna(inplace=True)
+        datasets[symbol] = data
+    return datasets
+
+
+def label_symbol(symbol, prices, indicator_params, threshold):
+    """Returns the labeled feature frame of one symbol, computed like each symbol of `label_panel`."""
+    if prices.empty:
+        raise ValueError(f"No price data for {symbol}")
+    return label_panel({symbol: prices}, indicator_params, threshold)[symbol]
+
+
+def score(data, symbol, indicator_params, threshold, model_params=None, n_folds=5, mode='expanding', workers=None):
+    """Evaluates one symbol's labeled frame walk-forward.
+
+    Returns (BacktestResult, predictions), where predictions has PREDICTION_COLUMNS
+    for every out-of-sample row.
+    """
+    result = walk_forward(data, indicator_params, threshold, model_params, n_folds=n_folds, mode=mode,
+                          data_id=symbol, workers=workers)
+    predictions = data.loc[result.predictions.index, ['Date', 'Close', 'Reversal']]
+    predictions.insert(0, 'Symbol', symbol)
+    predictions['Prediction'] = result.predictions
+    return result, predictions
+
+
+def _score_task(symbol, data, indicator_params, threshold, model_params, n_folds, mode):
+    started = time.perf_counter()
+    result, predictions = score(data, symbol, indicator_params, threshold, model_params, n_folds, mode, workers=1)
+    summary = {
+        'symbol': symbol,
+        'rows': len(data),
+        'predictions': len(predictions),
+        'accuracy': (predictions['Prediction'] == predictions['Reversal']).mean(),
+        'mean_fold_macro_f1': result.folds['macro_f1'].mean(),
+        'cached_folds': int(result.folds['cached_model'].sum()),
+        'seconds': time.perf_counter() - started,
+    }
+    return summary, predictions
+
+
+def score_symbols(prices, indicator_params=DEFAULT_PARAMS, threshold=DEFAULT_THRESHOLD, model_params=None,
+                  n_folds=5, mode='expanding', workers=None):
+    """Scores every symbol in {symbol: price frame}, one symbol per worker process.
+
+    Yields (summary, predictions) per symbol in completion order. Symbols with too
+    little data yield a summary with an `error` and no predictions.
+    """
+    datasets = label_panel(prices, indicator_params, threshold)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {}
+        for symbol in prices:
+            data = datasets.get(symbol)
+            if data is None or len(data) < MIN_ROWS:
+                rows = 0 if data is None else len(data)
+                yield {'symbol': symbol, 'rows': rows, 'error': f"only {rows} labeled rows"}, None
+                continue
+            future = executor.submit(_score_task, symbol, data, indicator_params, threshold, model_params, n_folds, mode)
+            futures[future] = symbol
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as error:
+                yield {'symbol': futures[future], 'error': str(error)}, None
+
+
+class PredictionWriter:
+    """Appends prediction frames to a CSV file, or to a Parquet file if the path ends in .parquet."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.rows = 0
+        self._writer = None
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Writing Parquet requires pyarrow (pip install pyarrow); use a .csv path instead")
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, predictions):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(predictions[PREDICTION_COLUMNS], preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            predictions[PREDICTION_COLUMNS].to_csv(self.path, mode='a', header=not os.path.exists(self.path), index=False)
+        self.rows += len(predictions)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score trend reversal predictions for many symbols.")
+    parser.add_argument('symbols', nargs='*', help="ticker symbols, e.g. ^GSPC AAPL")
+    parser.add_argument('--symbols-file', help="file with one symbol per line")
+    parser.add_argument('--start', default=DEFAULT_START)
+    parser.add_argument('--end', default=DEFAULT_END)
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--offline', action='store_true', help="use only data already in the market data store")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    for name, default in DEFAULT_PARAMS.items():
+        parser.add_argument('--' + name.replace('_', '-'), dest=name, type=type(default), default=default)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--mode', choices=['expanding', 'rolling'], default='expanding')
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default='predictions.csv', help="output file, .csv or .parquet")
+    parser.add_argument('--summary', default=None, help="optional CSV with one row of metrics per symbol")
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        with open(args.symbols_file) as symbols_file:
+            symbols += [line.strip() for line in symbols_file if line.strip() and not line.startswith('#')]
+    if not symbols:
+        parser.error("no symbols given")
+    symbols = list(dict.fromkeys(symbols))
+    indicator_params = {name: getattr(args, name) for name in DEFAULT_PARAMS}
+
+    started = time.perf_counter()
+    prices = load_prices(symbols, args.start, args.end, args.interval, MarketDataStore(offline=args.offline))
+    print(f"Loaded {len(prices)} symbols in {time.perf_counter() - started:.1f}s", flush=True)
+
+    summaries = []
+    scored = 0
+    with PredictionWriter(args.out) as writer:
+        results = score_symbols(prices, indicator_params, args.threshold, n_folds=args.folds, mode=args.mode,
+                                workers=args.workers)
+        for done, (summary, predictions) in enumerate(results, 1):
+            summaries.append(summary)
+            if predictions is None:
+                print(f"[{done}/{len(symbols)}] {summary['symbol']}: skipped ({summary['error']})", file=sys.stderr, flush=True)
+                continue
+            writer.write(predictions)
+            scored += 1
+            print(f"[{done}/{len(symbols)}] {summary['symbol']}: {summary['predictions']} predictions, "
+                  f"accuracy {summary['accuracy']:.3f}", flush=True)
+
+    if args.summary:
+        pd.DataFrame(summaries).to_csv(args.summary, index=False)
+    print(f"Wrote {writer.rows} predictions for {scored} symbols to {args.out} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
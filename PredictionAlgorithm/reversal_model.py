@@ -0,0 +1,42 @@
+"""Labels, datasets and the classifier for trend reversal prediction, shared by the app and the tools."""
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from indicators import FEATURE_COLUMNS
+
+DEFAULT_THRESHOLD = 0.02
+
+DEFAULT_MODEL_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': None,
+    'min_samples_leaf': 1,
+}
+
+
+def label_trend_reversals(data, threshold):
+    """Adds Return and Reversal (1 up, -1 down, 0 none) columns to `data` and returns it."""
+    data['Return'] = data['Close'].pct_change()
+    data['Reversal'] = np.where(data['Return'] > threshold, 1, np.where(data['Return'] < -threshold, -1, 0))
+    return data
+
+
+def build_dataset(engine, indicator_params, threshold):
+    """Returns the labeled feature frame for one parameter set, without rows that have missing values."""
+    data = label_trend_reversals(engine.features(**indicator_params), threshold)
+    data.dropna(inplace=True)
+    return data
+
+
+def make_model(n_jobs=None, **model_params):
+    params = dict(DEFAULT_MODEL_PARAMS, **model_params)
+    return RandomForestClassifier(random_state=42, n_jobs=n_jobs, **params)
+
+
+def chronological_split(data, test_size=0.2):
+    """Splits rows into an earlier training part and a later test part (no shuffling across time)."""
+    split = int(len(data) * (1 - test_size))
+    return data.iloc[:split], data.iloc[split:]
+
+
+def xy(data):
+    return data[FEATURE_COLUMNS], data['Reversal']
@@ -0,0 +1,175 @@
+"""Grid or random search over indicator parameters, reversal threshold and model hyperparameters.
+
+Configurations are grouped by their indicator parameters and evaluated in a process
+pool. Every indicator result the sweep needs is computed once, up front, in one
+IndicatorEngine. Each worker receives the prices once, and each task carries only
+the results of its own group, so configurations sharing an indicator never compute
+it again and worker memory does not grow with the number of groups.
+
+    python sweep.py --symbol ^GSPC --mode random --samples 200 --out sweep_results.csv
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+
+from indicators import DEFAULT_PARAMS, VOLATILITY_PERIOD, IndicatorEngine, feature_keys
+from reversal_model import DEFAULT_MODEL_PARAMS, build_dataset, chronological_split, make_model, xy
+
+INDICATOR_PARAMS = list(DEFAULT_PARAMS)
+MODEL_PARAMS = list(DEFAULT_MODEL_PARAMS)
+
+# Same ranges as the app's sliders
+PARAM_SPACE = {
+    'rsi_period': list(range(5, 51)),
+    'macd_short_period': list(range(5, 51)),
+    'macd_long_period': list(range(10, 101)),
+    'macd_signal_period': list(range(5, 51)),
+    'bollinger_period': list(range(5, 51)),
+    'bollinger_std_dev': [1, 2, 3],
+    'reversal_threshold': [0.01, 0.015, 0.02, 0.03, 0.04, 0.05],
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 5, 10, 20],
+    'min_samples_leaf': [1, 5, 20],
+}
+
+# A coarser space, small enough to search exhaustively
+GRID_SPACE = {
+    'rsi_period': [7, 14, 21],
+    'macd_short_period': [12],
+    'macd_long_period': [26],
+    'macd_signal_period': [9],
+    'bollinger_period': [10, 20],
+    'bollinger_std_dev': [2],
+    'reversal_threshold': [0.01, 0.02],
+    'n_estimators': [100],
+    'max_depth': [None, 10],
+    'min_samples_leaf': [1, 5],
+}
+
+
+def grid_configs(space=GRID_SPACE):
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_configs(samples, space=PARAM_SPACE, seed=42):
+    rng = random.Random(seed)
+    configs = []
+    while len(configs) < samples:
+        config = {name: rng.choice(values) for name, values in space.items()}
+        if config['macd_short_period'] < config['macd_long_period']:
+            configs.append(config)
+    return configs
+
+
+def _indicator_key(config):
+    return tuple(config[name] for name in INDICATOR_PARAMS)
+
+
+_engine = None
+
+
+def _init_worker(prices):
+    # A plain frame rather than the engine, so spawn and forkserver workers can unpickle it
+    global _engine
+    _engine = IndicatorEngine(prices, max_entries=len(feature_keys(**DEFAULT_PARAMS)))
+
+
+def _evaluate_group(indicator_key, indicators, configs, test_size):
+    """Evaluates every config sharing one set of indicator parameters. Runs in a worker process.
+
+    `indicators` holds this group's precomputed results, by engine cache key.
+    """
+    indicator_params = dict(zip(INDICATOR_PARAMS, indicator_key))
+    _engine.cache.clear()
+    _engine.cache.update(indicators)
+    datasets = {}
+    results = []
+    for config in configs:
+        threshold = config['reversal_threshold']
+        if threshold not in datasets:
+            datasets[threshold] = chronological_split(build_dataset(_engine, indicator_params, threshold), test_size)
+        train, test = datasets[threshold]
+        X_train, y_train = xy(train)
+        X_test, y_test = xy(test)
+
+        started = time.perf_counter()
+        model = make_model(n_jobs=1, **{name: config[name] for name in MODEL_PARAMS})
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        results.append(dict(
+            config,
+            accuracy=accuracy_score(y_test, y_pred),
+            macro_f1=f1_score(y_test, y_pred, average='macro', zero_division=0),
+            train_rows=len(train),
+            seconds=time.perf_counter() - started,
+        ))
+    return results
+
+
+def run_sweep(prices, configs, workers=None, test_size=0.2, progress=None):
+    """Evaluates `configs` on `prices` and returns a results table ranked by macro F1, best first.
+
+    Each model is trained on the earliest (1 - test_size) of the rows and scored on the rest.
+    `progress(done, total)` is called as configuration groups finish.
+    """
+    groups = defaultdict(list)
+    for config in configs:
+        groups[_indicator_key(config)].append(config)
+
+    # Compute every distinct indicator once, before any worker starts
+    engine = IndicatorEngine(prices, max_entries=4 * len(groups) + 1)
+    engine.get('std', VOLATILITY_PERIOD)
+    for indicator_key in groups:
+        engine.features(**dict(zip(INDICATOR_PARAMS, indicator_key)))
+
+    def group_indicators(indicator_key):
+        return {key: engine.get(*key) for key in feature_keys(*indicator_key)}
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(engine.prices,)) as executor:
+        futures = [executor.submit(_evaluate_group, key, group_indicators(key), group, test_size)
+                   for key, group in groups.items()]
+        for done, future in enumerate(as_completed(futures), 1):
+            results.extend(future.result())
+            if progress:
+                progress(done, len(futures))
+
+    table = pd.DataFrame(results)
+    return table.sort_values(['macro_f1', 'accuracy'], ascending=False, ignore_index=True)
+
+
+def main():
+    from market_data import MarketDataStore
+
+    parser = argparse.ArgumentParser(description="Search indicator parameters and model hyperparameters for the reversal model.")
+    parser.add_argument('--symbol', default='^GSPC')
+    parser.add_argument('--start', default='2000-01-01')
+    parser.add_argument('--end', default='2023-01-01')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='random')
+    parser.add_argument('--samples', type=int, default=100, help="configurations to try in random mode")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    prices = MarketDataStore().load(args.symbol, args.start, args.end)
+    configs = grid_configs() if args.mode == 'grid' else random_configs(args.samples, seed=args.seed)
+    started = time.perf_counter()
+    table = run_sweep(prices, configs, workers=args.workers,
+                      progress=lambda done, total: print(f"{done}/{total} parameter groups done", flush=True))
+    table.to_csv(args.out, index=False)
+    print(f"Evaluated {len(table)} configurations in {time.perf_counter() - started:.1f}s; results in {args.out}")
+    print(table.head(10).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from market_data import PRICE_COLUMNS, MarketDataStore
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'gspc_daily.csv')
+
+
+def no_network(*args):
+    raise AssertionError(f"fetch called offline: {args}")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MarketDataStore(root=str(tmp_path), fetch=no_network, offline=True)
+    store.import_csv('^GSPC', FIXTURE)
+    return store
+
+
+def test_load_returns_the_fixture(store):
+    data = store.load('^GSPC', '2024-01-01', '2024-12-31')
+    expected = pd.read_csv(FIXTURE, parse_dates=['Date'])
+
+    assert list(data.columns) == ['Date'] + PRICE_COLUMNS
+    assert data['Date'].dtype == 'datetime64[ns]'
+    assert all(data[column].dtype == np.float64 for column in PRICE_COLUMNS)
+    assert (data['Date'] == expected['Date']).all()
+    np.testing.assert_array_equal(data[PRICE_COLUMNS].to_numpy(), expected[PRICE_COLUMNS].to_numpy(dtype=np.float64))
+
+
+def test_load_slices_the_date_range(store):
+    data = store.load('^GSPC', '2024-01-08', '2024-01-12')
+
+    # [start, end): the end date is not included
+    assert data['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-08', '2024-01-09', '2024-01-10', '2024-01-11']
+
+
+def test_load_outside_the_stored_range_does_not_fetch(store):
+    assert store.load('^GSPC', '2020-01-01', '2020-12-31').empty
+    assert store.load('AAPL', '2024-01-01', '2024-12-31').empty
+
+
+class RecordingFetch:
+    """Business-day bars for each requested range, starting 3 days early so fetches overlap.
+
+    Close is the number of the call that returned the bar, to tell which copy was kept.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbol, start, end, interval):
+        self.calls.append((start, end))
+        dates = pd.bdate_range(pd.Timestamp(start) - pd.Timedelta(days=3), end, inclusive='left')
+        close = np.full(len(dates), float(len(self.calls)))
+        return pd.DataFrame({'Date': dates, 'Open': close, 'High': close, 'Low': close, 'Close': close,
+                             'Volume': close})
+
+
+def test_load_fetches_only_missing_ranges(tmp_path):
+    fetch = RecordingFetch()
+    store = MarketDataStore(root=str(tmp_path), fetch=fetch)
+
+    # Cold: the whole range
+    store.load('^GSPC', '2024-01-01', '2024-02-01')
+    assert fetch.calls == [('2024-01-01', '2024-02-01')]
+
+    # Partly covered: only the dates on either side of the stored range
+    data = store.load('^GSPC', '2023-12-01', '2024-03-01')
+    assert fetch.calls[1:] == [('2023-12-01', '2024-01-01'), ('2024-02-01', '2024-03-01')]
+
+    # Fully covered: nothing
+    store.load('^GSPC', '2024-01-10', '2024-02-20')
+    assert len(fetch.calls) == 3
+
+    # Overlapping bars are stored once, from the most recent fetch
+    dates = data['Date']
+    assert dates.is_unique and dates.is_monotonic_increasing
+    assert dates.iloc[0] == pd.Timestamp('2023-12-01') and dates.iloc[-1] == pd.Timestamp('2024-02-29')
+    close = data.set_index('Date')['Close']
+    assert close['2023-12-29'] == 2 and close['2024-01-02'] == 1
+    assert (close['2024-01-29':'2024-01-31'] == 3).all() and (close['2024-02-01':] == 3).all()
+
+    records, coverage = store.read('^GSPC')
+    assert len(np.unique(records['Date'])) == len(records)
+    assert pd.Timestamp(coverage['start']) == pd.Timestamp('2023-12-01')
+    assert pd.Timestamp(coverage['end']) == pd.Timestamp('2024-03-01')
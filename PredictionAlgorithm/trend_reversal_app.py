@@ -1,15 +1,16 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
-import matplotlib.pyplot as plt
+from chart import ReversalChart
+from pipeline import label_symbol, load_prices, score
+from sweep import random_configs, run_sweep
+
+# Sidebar controls for the data
+st.sidebar.header("Data")
+symbol = st.sidebar.text_input("Symbol", "^GSPC").strip()
 
 # Streamlit title and description
-st.title("S&P 500 Trend Reversal Prediction")
-st.write("This app allows you to explore trend reversals in the S&P 500 index using technical indicators and machine learning.")
+st.title(f"{symbol} Trend Reversal Prediction")
+st.write(f"This app allows you to explore trend reversals in {symbol} using technical indicators and machine learning.")
 
 # Sidebar controls for indicator parameters
 st.sidebar.header("Indicator Parameters")
@@ -29,6 +30,11 @@ bollinger_std_dev = st.sidebar.slider("Bollinger Band Std Dev", min_value=1, max
 # Trend reversal threshold
 reversal_threshold = st.sidebar.slider("Trend Reversal Threshold", min_value=0.01, max_value=0.05, value=0.02)
 
+# Walk-forward evaluation
+st.sidebar.header("Model Evaluation")
+n_folds = st.sidebar.slider("Walk-Forward Folds", min_value=2, max_value=10, value=5)
+window_mode = st.sidebar.selectbox("Training Window", ["expanding", "rolling"])
+
 # Graph customization options
 st.sidebar.header("Visualization Options")
 
@@ -48,137 +54,98 @@ alpha = st.sidebar.slider("Transparency", min_value=0.1, max_value=1.0, value=0.
 # Y-axis scale
 y_axis_scale = st.sidebar.selectbox("Y-axis Scale", ["linear", "log"])
 
-# Download SPX data
+# Load price data from the local store; only dates it has not seen yet are downloaded
+@st.cache_data
+def load_data(symbol):
+    return load_prices([symbol])[symbol]
+
+indicator_params = {
+    'rsi_period': rsi_period,
+    'macd_short_period': macd_short_period,
+    'macd_long_period': macd_long_period,
+    'macd_signal_period': macd_signal_period,
+    'bollinger_period': bollinger_period,
+    'bollinger_std_dev': bollinger_std_dev,
+}
+
+# The price history with indicators and labels, computed by the same pipeline as the command line
+# and cached per parameter set, so returning to earlier slider values costs nothing
+@st.cache_data
+def load_dataset(symbol, indicator_params, reversal_threshold):
+    return label_symbol(symbol, load_data(symbol), indicator_params, reversal_threshold)
+
+try:
+    spx_data = load_dataset(symbol, indicator_params, reversal_threshold)
+except Exception as e:
+    # Unknown symbol, or no stored or downloadable prices for it
+    st.error(f"Could not load price data for {symbol}: {e}")
+    st.stop()
+
+# Walk-forward evaluation: every fold trains on earlier rows and predicts the following block.
+# Results are cached for this session, and fitted models on disk, so reruns that only
+# change the plot styling do not retrain anything.
 @st.cache_data
-def load_data():
-    spx_data = yf.download('^GSPC', start='2000-01-01', end='2023-01-01', interval='1d')
-    spx_data.reset_index(inplace=True)
-    return spx_data[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-
-spx_data = load_data()
-
-# RSI calculation
-def calculate_rsi(data, period):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-spx_data['RSI'] = calculate_rsi(spx_data, rsi_period)
-
-# MACD calculation
-def calculate_macd(data, short_period, long_period, signal_period):
-    short_ema = data['Close'].ewm(span=short_period, adjust=False).mean()
-    long_ema = data['Close'].ewm(span=long_period, adjust=False).mean()
-    macd = short_ema - long_ema
-    signal_line = macd.ewm(span=signal_period, adjust=False).mean()
-    return macd, signal_line
-
-spx_data['MACD'], spx_data['Signal_Line'] = calculate_macd(spx_data, macd_short_period, macd_long_period, macd_signal_period)
-
-# Bollinger Bands calculation
-def calculate_bollinger_bands(data, period, num_std_dev):
-    sma = data['Close'].rolling(window=period).mean()
-    rolling_std = data['Close'].rolling(window=period).std()
-    upper_band = sma + (rolling_std * num_std_dev)
-    lower_band = sma - (rolling_std * num_std_dev)
-    return sma, upper_band, lower_band
-
-spx_data['SMA'], spx_data['Upper_Band'], spx_data['Lower_Band'] = calculate_bollinger_bands(spx_data, bollinger_period, bollinger_std_dev)
-
-# Standard Deviation for volatility
-spx_data['Standard_Deviation'] = spx_data['Close'].rolling(window=20).std()
-
-# Label trend reversals
-def label_trend_reversals(data, threshold):
-    data['Return'] = data['Close'].pct_change()
-    data['Reversal'] = np.where(data['Return'] > threshold, 1, np.where(data['Return'] < -threshold, -1, 0))
-    return data
-
-spx_data = label_trend_reversals(spx_data, reversal_threshold)
-spx_data.dropna(inplace=True)
-
-# Create feature matrix
-feature_columns = ['RSI', 'MACD', 'Signal_Line', 'SMA', 'Upper_Band', 'Lower_Band', 'Standard_Deviation']
-X = spx_data[feature_columns]
-y = spx_data['Reversal']
-
-# Split the data while preserving index information
-indices = np.arange(len(X))
-X_train_idx, X_test_idx, y_train, y_test = train_test_split(indices, y, test_size=0.2, random_state=42)
-
-# Get the actual training and test sets
-X_train = X.iloc[X_train_idx]
-X_test = X.iloc[X_test_idx]
-
-# Train the Random Forest model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-# Make predictions
-y_pred = model.predict(X_test)
+def evaluate_model(symbol, indicator_params, reversal_threshold, n_folds, window_mode):
+    data = load_dataset(symbol, indicator_params, reversal_threshold)
+    return score(data, symbol, indicator_params, reversal_threshold, n_folds=n_folds, mode=window_mode)
+
+try:
+    backtest, predictions = evaluate_model(symbol, indicator_params, reversal_threshold, n_folds, window_mode)
+except ValueError as e:
+    # Too little history for the chosen folds
+    st.error(f"Could not evaluate the model on {symbol}: {e}")
+    st.stop()
+y_test = predictions['Reversal']
+y_pred = predictions['Prediction']
 accuracy = accuracy_score(y_test, y_pred)
 
 # Display evaluation results in an expander
 with st.expander("Model Performance Metrics"):
-    st.write("Model Accuracy:", accuracy)
+    st.write("Out-of-sample Accuracy:", accuracy)
     st.text("Classification Report:")
-    st.text(classification_report(y_test, y_pred))
-
-# Set the plot style
-plt.style.use(plot_style)
-
-# Create a figure for plotting
-fig, ax = plt.subplots(figsize=(14, 8))
-
-# Plot SPX Close Price
-ax.plot(spx_data['Date'], spx_data['Close'],
-        label='SPX Close Price',
-        color=price_color,
-        linewidth=line_width,
-        alpha=alpha)
+    st.text(classification_report(y_test, y_pred, zero_division=0))
+    st.write("Walk-forward folds:")
+    st.dataframe(backtest.folds)
+    st.write(f"Total training time: {backtest.train_seconds:.2f}s, total inference time: {backtest.predict_seconds:.3f}s")
+
+# Search many indicator and model settings at once instead of trying sliders one by one
+with st.expander("Parameter Sweep"):
+    sweep_samples = st.number_input("Random configurations to try", min_value=10, max_value=1000, value=50, step=10)
+    if st.button("Run Sweep"):
+        progress_bar = st.progress(0.0)
+        st.session_state['sweep_results'] = run_sweep(
+            load_data(symbol),
+            random_configs(int(sweep_samples)),
+            progress=lambda done, total: progress_bar.progress(done / total),
+        )
+    if 'sweep_results' in st.session_state:
+        st.write("Configurations ranked by macro F1 on the most recent 20% of the data:")
+        st.dataframe(st.session_state['sweep_results'])
+
+# Render the chart. The price line is decimated to the chart width and drawn once;
+# only the reversal markers are redrawn when they or their styling change.
+if 'chart' not in st.session_state:
+    st.session_state['chart'] = ReversalChart()
 
-# Plot actual reversals
 actual_reversals = spx_data[spx_data['Reversal'] != 0]
-ax.scatter(actual_reversals['Date'],
-          actual_reversals['Close'],
-          color=actual_reversal_color,
-          marker='o',
-          label='Actual Reversal',
-          alpha=alpha,
-          s=marker_size)
-
-# Plot predicted reversals
-test_dates = spx_data.iloc[X_test_idx]['Date']
-test_prices = spx_data.iloc[X_test_idx]['Close']
-predicted_reversals_mask = y_pred != 0
-
-ax.scatter(test_dates[predicted_reversals_mask],
-          test_prices[predicted_reversals_mask],
-          color=predicted_reversal_color,
-          marker='x',
-          label='Predicted Reversal',
-          alpha=alpha,
-          s=marker_size)
-
-# Set y-axis scale
-ax.set_yscale(y_axis_scale)
-
-# Formatting the plot
-ax.set_title('S&P 500 Trend Reversal Analysis', pad=20)
-ax.set_xlabel('Date')
-ax.set_ylabel('Price')
-ax.legend(loc='upper left')
-plt.xticks(rotation=45)
-plt.grid(True, alpha=0.3)
-
-# Add padding to the layout
-plt.tight_layout()
+predicted_reversals = predictions[predictions['Prediction'] != 0]
+chart_image = st.session_state['chart'].render(
+    spx_data['Date'].to_numpy(), spx_data['Close'].to_numpy(),
+    actual_reversals['Date'].to_numpy(), actual_reversals['Close'].to_numpy(),
+    predicted_reversals['Date'].to_numpy(), predicted_reversals['Close'].to_numpy(),
+    symbol=symbol,
+    plot_style=plot_style,
+    price_color=price_color,
+    actual_color=actual_reversal_color,
+    predicted_color=predicted_reversal_color,
+    marker_size=marker_size,
+    line_width=line_width,
+    alpha=alpha,
+    y_axis_scale=y_axis_scale,
+)
 
 # Display the plot
-st.pyplot(fig)
+st.image(chart_image)
 
 # Add additional statistics in an expander
 with st.expander("Additional Statistics"):
@@ -1,80 +1,210 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, url_for
 from flask_cors import CORS
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MinMaxScaler
-from fuzzywuzzy import process
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import os
+import sys
 from dotenv import load_dotenv
-import subprocess
+import numpy as np
+from catalog import load_catalog
+from jobs import JobRunner
+from similarity import top_k_many
+from spotify_links import LinkCache, LinkResolver, make_spotify_client
+from update_songs import update_songs_csv
+
+# Request timing and /metrics, shared by the backends in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from instrumentation import instrument, stage
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+instrument(app)
 
 # Spotify API credentials
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 
 # Initialize Spotify client
-sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=SPOTIFY_CLIENT_ID, client_secret=SPOTIFY_CLIENT_SECRET))
+sp = make_spotify_client(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
+
+# Spotify links are cached next to songs.csv and looked up concurrently on a miss
+link_resolver = LinkResolver(sp, LinkCache('spotify_links.db'))
+
+# Tracks from the top of songs.csv whose links are looked up in the background after each load (0: none)
+LINK_PREFETCH_LIMIT = int(os.getenv("SPOTIFY_PREFETCH_LIMIT", "2000"))
+
+# Nearest-neighbour index used for recommendations: 'exact' or 'lsh' (approximate)
+SONG_INDEX_TYPE = os.getenv("SONG_INDEX_TYPE", "exact")
+
+# Limits for /recommend/batch
+MAX_BATCH_SEEDS = 100
+MAX_BATCH_K = 50
+
+# Most titles /songs?q= returns for one prefix
+MAX_PREFIX_LIMIT = 100
 
 # Load and preprocess the dataset
+@stage("catalog_load")
 def load_songs():
-    global songs
-    songs = pd.read_csv('songs.csv')
-    features = ['danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo']
-    scaler = MinMaxScaler()
-    songs[features] = scaler.fit_transform(songs[features])
+    global catalog
+    new_catalog = load_catalog('songs.csv', SONG_INDEX_TYPE)
+    # Swapping the reference is atomic: requests keep using whichever snapshot they started with
+    catalog = new_catalog
+    # Resolve links for the top of the chart in the background, throttled, so /recommend finds them cached
+    link_resolver.prefetch(zip(new_catalog.names, new_catalog.artists), limit=LINK_PREFETCH_LIMIT)
+    return new_catalog
 
 load_songs()
 
-def get_spotify_link(track_name, artist_name):
-    query = f"track:{track_name} artist:{artist_name}"
-    results = sp.search(q=query, type="track", limit=1)
-
-    if results["tracks"]["items"]:
-        return results["tracks"]["items"][0]["external_urls"]["spotify"]
-    return None
+@stage("catalog_refresh")
+def refresh_songs():
+    """Refreshes songs.csv from Last.fm and Spotify, then swaps in a freshly built catalog."""
+    update_songs_csv('songs.csv', sp=sp)
+    new_catalog = load_songs()
+    return {'tracks': len(new_catalog.names)}
+
+refresh_jobs = JobRunner(refresh_songs)
+
+@stage("fuzzy_match")
+def find_song(songs, query):
+    """Returns the catalog row whose title best matches `query`, or None if no title scores at least 60."""
+    match = songs.titles.match(query)
+    if match is None or match[1] < 60:  # If the match score is too low, consider it not found
+        return None
+    return match[2]
+
+@stage("spotify_links")
+def describe_songs(songs, rows):
+    """Returns {row: {'name', 'artist', 'spotify_link'}}, resolving all Spotify links in one batch."""
+    rows = list(dict.fromkeys(rows))
+    pairs = [(songs.names[row], songs.artists[row]) for row in rows]
+    links = link_resolver.resolve_many(pairs)
+    return {row: {'name': name, 'artist': artist, 'spotify_link': link} for row, (name, artist), link in zip(rows, pairs, links)}
+
+def format_recommendations(picks, details):
+    return [dict(details[row], similarity=round(float(score) * 100, 2)) for row, score in picks]
 
 @app.route('/recommend', methods=['POST'])
 def recommend_songs():
     data = request.json
     input_song = data['song']
-    features = ['danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo']
+    songs = catalog  # One snapshot for the whole request, even if a refresh swaps it meanwhile
 
     # Find the closest match using fuzzy string matching
-    closest_match, score, _ = process.extractOne(input_song, songs['name'])
-
-    if score < 60:  # If the match score is too low, consider it not found
+    match_row = find_song(songs, input_song)
+    if match_row is None:
         return jsonify({'error': 'Song not found in the database'}), 404
 
-    input_features = songs[songs['name'] == closest_match][features].values
-    similarity_scores = cosine_similarity(input_features, songs[features])[0]
-    similar_indices = similarity_scores.argsort()[::-1][1:6]  # Top 5 similar songs
-
-    recommendations = songs.iloc[similar_indices][['name', 'artist']].to_dict('records')
-    for i, rec in enumerate(recommendations):
-        rec['similarity'] = round(similarity_scores[similar_indices[i]] * 100, 2)
-        rec['spotify_link'] = get_spotify_link(rec['name'], rec['artist'])
+    # Top 5 similar songs, excluding the input song itself
+    with stage("similarity"):
+        similar_indices, similarity_scores = songs.index.query(songs.vectors[match_row], k=5, exclude=[match_row])
 
+    picks = list(zip(similar_indices.tolist(), similarity_scores.tolist()))
+    recommendations = format_recommendations(picks, describe_songs(songs, similar_indices.tolist()))
     return jsonify(recommendations)
 
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    # Body: {"songs": [...], "k": 5, "exclude": [...], "mode": "seeds" | "playlist"}
+    # "seeds": every seed gets its own list, and a song is only recommended for the seed it is most similar to
+    # "playlist": the seeds are averaged into one centroid and a single list is returned
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': "Expected a JSON object with a 'songs' list"}), 400
+    seeds = data.get('songs')
+    mode = data.get('mode', 'seeds')
+    k = data.get('k', 5)
+    exclude = data.get('exclude', [])
+    if not isinstance(seeds, list) or not seeds or len(seeds) > MAX_BATCH_SEEDS:
+        return jsonify({'error': f"'songs' must be a list of 1 to {MAX_BATCH_SEEDS} song names"}), 400
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= MAX_BATCH_K:
+        return jsonify({'error': f"'k' must be an integer from 1 to {MAX_BATCH_K}"}), 400
+    if mode not in ('seeds', 'playlist'):
+        return jsonify({'error': "'mode' must be 'seeds' or 'playlist'"}), 400
+    if not isinstance(exclude, list):
+        return jsonify({'error': "'exclude' must be a list of song names"}), 400
+    songs = catalog
+
+    seed_rows = {}  # matched row -> first seed that matched it
+    not_found = []
+    for seed in seeds:
+        row = find_song(songs, seed)
+        if row is None:
+            not_found.append(seed)
+        else:
+            seed_rows.setdefault(row, seed)
+    if not seed_rows:
+        return jsonify({'error': 'None of the songs were found in the database', 'not_found': not_found}), 404
+
+    # Seeds themselves are never recommended, nor is anything on the exclusion list
+    excluded = set(seed_rows)
+    excluded.update(row for row in (find_song(songs, song) for song in exclude) if row is not None)
+    rows = list(seed_rows)
+
+    if mode == 'playlist':
+        centroid = songs.vectors[rows].mean(axis=0)
+        centroid /= np.linalg.norm(centroid) or 1.0
+        with stage("similarity"):
+            indices, scores = top_k_many(songs.vectors, centroid[np.newaxis], k + len(excluded))
+        picks = [(row, score) for row, score in zip(indices[0].tolist(), scores[0].tolist()) if row not in excluded][:k]
+        details = describe_songs(songs, [row for row, _ in picks])
+        return jsonify({
+            'mode': mode,
+            'seeds': [songs.names[row] for row in rows],
+            'recommendations': format_recommendations(picks, details),
+            'not_found': not_found,
+        })
+
+    # Fetch enough candidates per seed that each can still get k songs after the
+    # other seeds have claimed theirs, then hand each song to its most similar seed
+    with stage("similarity"):
+        indices, scores = top_k_many(songs.vectors, songs.vectors[rows], k * len(rows) + len(excluded))
+    candidates = sorted(
+        (-score, seed, row)
+        for seed in range(len(rows))
+        for row, score in zip(indices[seed].tolist(), scores[seed].tolist())
+        if row not in excluded
+    )
+    picks = [[] for _ in rows]
+    taken = set()
+    for negative_score, seed, row in candidates:
+        if row not in taken and len(picks[seed]) < k:
+            picks[seed].append((row, -negative_score))
+            taken.add(row)
+
+    details = describe_songs(songs, taken)
+    results = [
+        {'seed': seed_rows[row], 'match': songs.names[row], 'recommendations': format_recommendations(seed_picks, details)}
+        for row, seed_picks in zip(rows, picks)
+    ]
+    return jsonify({'mode': mode, 'results': results, 'not_found': not_found})
+
 @app.route('/songs', methods=['GET'])
 def get_songs():
-    return jsonify(songs['name'].tolist())
+    # Optional ?q= prefix search for autocomplete, otherwise every song name
+    songs = catalog
+    query = request.args.get('q')
+    if query is not None:
+        limit = request.args.get('limit', default=20, type=int)
+        if not 1 <= limit <= MAX_PREFIX_LIMIT:
+            return jsonify({'error': f"'limit' must be an integer from 1 to {MAX_PREFIX_LIMIT}"}), 400
+        return jsonify(songs.titles.prefix(query, limit=limit))
+    return jsonify(list(songs.names))
 
 @app.route('/update_songs', methods=['POST'])
 def update_songs():
-    try:
-        result = subprocess.run(['python3', 'update_songs.py'], capture_output=True, text=True, check=True)
-        load_songs()  # Reload the updated songs
-        return jsonify({'message': 'Songs updated successfully', 'details': result.stdout}), 200
-    except subprocess.CalledProcessError as e:
-        return jsonify({'error': 'Failed to update songs', 'details': e.stderr}), 500
+    # The refresh runs in the background; poll the returned status URL for the result
+    job = refresh_jobs.start()
+    job['status_url'] = url_for('update_songs_status', job_id=job['id'])
+    job['message'] = 'Song update started'
+    return jsonify(job), 202
+
+@app.route('/update_songs/<job_id>', methods=['GET'])
+def update_songs_status(job_id):
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown update job'}), 404
+    return jsonify(job)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,113 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from catalog_file import StringColumn, StringTable, encode_strings, read_catalog_file, read_catalog_header, write_catalog_file
+from similarity import FEATURES, build_feature_matrix, build_index
+from title_index import TitleIndex
+
+# Everything a request needs to answer from one version of the song database.
+# A snapshot is never modified after it is built: a refresh builds a new one and the
+# app swaps its reference, so requests never see a half-loaded catalog.
+Catalog = namedtuple('Catalog', ['names', 'artists', 'vectors', 'index', 'titles'])
+
+
+def compiled_path(csv_path):
+    """Returns where the compiled form of a CSV catalog lives (songs.csv -> songs.catalog)."""
+    return os.path.splitext(csv_path)[0] + '.catalog'
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def compile_catalog(csv_path='songs.csv', output_path=None):
+    """Imports songs.csv into the compiled binary catalog format and returns the compiled file's path.
+
+    The file holds the scaled, L2-normalized float32 feature matrix, the MinMaxScaler
+    parameters, an interned table of name and artist strings, and the title search index.
+    """
+    output_path = output_path or compiled_path(csv_path)
+    songs = pd.read_csv(csv_path)
+    scaler = MinMaxScaler()
+    vectors = build_feature_matrix(scaler.fit_transform(songs[FEATURES]))
+
+    names = [str(name) for name in songs['name']]
+    artists = [str(artist) for artist in songs['artist']]
+    string_ids = {}
+    name_ids = np.array([string_ids.setdefault(name, len(string_ids)) for name in names], dtype=np.int32)
+    artist_ids = np.array([string_ids.setdefault(artist, len(string_ids)) for artist in artists], dtype=np.int32)
+    strings, string_offsets = encode_strings(string_ids)
+
+    titles = TitleIndex.build(names)
+    title_strings, title_offsets = encode_strings(titles.titles)
+    gram_strings, gram_string_offsets = encode_strings(titles.grams)
+
+    arrays = {
+        'vectors': vectors,
+        'strings': strings,
+        'string_offsets': string_offsets,
+        'name_ids': name_ids,
+        'artist_ids': artist_ids,
+        'titles': title_strings,
+        'title_offsets': title_offsets,
+        'title_rows': titles.title_rows,
+        'grams': gram_strings,
+        'gram_string_offsets': gram_string_offsets,
+        'gram_offsets': titles.gram_offsets,
+        'postings': titles.postings,
+    }
+    metadata = {
+        'rows': len(songs),
+        'features': FEATURES,
+        'scaler': {'data_min': scaler.data_min_.tolist(), 'data_max': scaler.data_max_.tolist()},
+        'source': _source_stamp(csv_path),
+    }
+    write_catalog_file(output_path, arrays, metadata)
+    return output_path
+
+
+def open_catalog(path, index_type='exact'):
+    """Opens a compiled catalog as a snapshot backed by memory-mapped arrays."""
+    arrays, metadata = read_catalog_file(path)
+    if metadata['features'] != FEATURES:
+        raise ValueError(f"{path} was compiled with different audio features; recompile it from the CSV")
+
+    strings = StringTable(arrays['strings'], arrays['string_offsets'])
+    names = StringColumn(strings, arrays['name_ids'])
+    titles = TitleIndex(
+        names,
+        titles=StringTable(arrays['titles'], arrays['title_offsets']),
+        title_rows=arrays['title_rows'],
+        grams=StringTable(arrays['grams'], arrays['gram_string_offsets']),
+        gram_offsets=arrays['gram_offsets'],
+        postings=arrays['postings'],
+    )
+    return Catalog(
+        names=names,
+        artists=StringColumn(strings, arrays['artist_ids']),
+        vectors=arrays['vectors'],
+        index=build_index(arrays['vectors'], index_type),
+        titles=titles,
+    )
+
+
+def is_compiled(csv_path, path=None):
+    """True if the compiled catalog exists and was built from the current contents of the CSV."""
+    header = read_catalog_header(path or compiled_path(csv_path))
+    if header is None:
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return header['metadata'].get('source') == _source_stamp(csv_path)
+
+
+def load_catalog(path='songs.csv', index_type='exact'):
+    """Opens the compiled form of the CSV catalog at `path`, compiling it first if it is missing or stale."""
+    if not is_compiled(path):
+        compile_catalog(path)
+    return open_catalog(compiled_path(path), index_type)
@@ -0,0 +1,120 @@
+import json
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+
+import numpy as np
+
+# Compiled catalog file layout:
+#   8 bytes   magic
+#   8 bytes   header length (little-endian uint64)
+#   header    JSON: format version, metadata, and dtype/shape/offset of every array
+#   arrays    raw little-endian arrays, each starting on a 64-byte boundary
+# Arrays are opened with numpy.memmap, so every process reading the same file shares
+# one copy in the OS page cache and nothing is parsed at startup.
+MAGIC = b'SONGCAT\x01'
+VERSION = 1
+ALIGNMENT = 64
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def encode_strings(strings):
+    """Packs strings into a UTF-8 byte array plus an offsets array (string i is data[offsets[i]:offsets[i + 1]])."""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+class StringTable(Sequence):
+    """Read-only sequence of strings stored as a byte array and offsets, decoded on access."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('string table index out of range')
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+
+class StringColumn(Sequence):
+    """A column of interned strings: row i holds table[ids[i]]."""
+
+    def __init__(self, table, ids):
+        self.table = table
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return self.table[int(self.ids[i])]
+
+
+def write_catalog_file(path, arrays, metadata):
+    """Writes arrays and JSON-serializable metadata to `path`, replacing any existing file in one step."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.newbyteorder('<').str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'version': VERSION, 'metadata': metadata, 'arrays': layout}).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    catalog_file = tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.tmp', delete=False)
+    try:
+        with catalog_file:
+            catalog_file.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            for name, array in arrays.items():
+                catalog_file.seek(data_start + layout[name]['offset'])
+                catalog_file.write(array.astype(layout[name]['dtype'], copy=False).tobytes())
+        os.replace(catalog_file.name, path)
+    except BaseException:
+        os.remove(catalog_file.name)
+        raise
+
+
+def read_catalog_header(path):
+    """Returns the parsed JSON header of a compiled catalog, or None if the file is missing or not a catalog."""
+    try:
+        with open(path, 'rb') as catalog_file:
+            prefix = catalog_file.read(len(MAGIC) + 8)
+            if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+                return None
+            (header_length,) = struct.unpack('<Q', prefix[len(MAGIC):])
+            header = json.loads(catalog_file.read(header_length))
+    except (OSError, ValueError):
+        return None
+    if header.get('version') != VERSION:
+        return None
+    header['data_start'] = _align(len(MAGIC) + 8 + header_length)
+    return header
+
+
+def read_catalog_file(path):
+    """Opens a compiled catalog. Returns (arrays, metadata); arrays are read-only memory maps."""
+    header = read_catalog_header(path)
+    if header is None:
+        raise ValueError(f"{path} is not a compiled song catalog")
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=spec['dtype'])  # mmap cannot map zero bytes
+        else:
+            arrays[name] = np.memmap(path, dtype=spec['dtype'], mode='r', offset=header['data_start'] + spec['offset'], shape=shape)
+    return arrays, header['metadata']
@@ -0,0 +1,53 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobRunner:
+    """Runs a background task on a single worker thread and keeps its status for polling.
+
+    Only one job runs at a time. Starting a job while another is queued or running
+    returns the existing job instead of queueing a duplicate.
+    """
+
+    def __init__(self, task, history=20):
+        self.task = task
+        self.history = history
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jobs')
+        self.lock = threading.Lock()
+        self.jobs = {}  # job id -> status dict, oldest first
+
+    def start(self):
+        with self.lock:
+            for job in self.jobs.values():
+                if job['status'] in ('queued', 'running'):
+                    return dict(job)
+            job = {'id': uuid.uuid4().hex, 'status': 'queued', 'created_at': time.time(),
+                   'started_at': None, 'finished_at': None, 'details': None, 'error': None}
+            self.jobs[job['id']] = job
+            # Forget the oldest finished jobs
+            while len(self.jobs) > self.history:
+                del self.jobs[next(iter(self.jobs))]
+            self.executor.submit(self._run, job)
+            return dict(job)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job, **changes):
+        with self.lock:
+            job.update(changes)
+
+    def _run(self, job):
+        self._update(job, status='running', started_at=time.time())
+        try:
+            details = self.task()
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, status='failed', error=str(e), finished_at=time.time())
+        else:
+            self._update(job, status='succeeded', details=details, finished_at=time.time())
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Audio features used to compare songs
+FEATURES = ['danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo']
+
+
+def build_feature_matrix(scaled_features):
+    """Returns a contiguous float32 matrix whose rows are L2-normalized, so cosine similarity is a dot product."""
+    matrix = np.ascontiguousarray(scaled_features, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # All-zero rows stay zero instead of turning into NaN
+    matrix /= norms
+    return matrix
+
+
+def top_k(scores, k):
+    """Returns the indices of the k highest scores, best first, without sorting the whole array."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def select_top_k(scores, k, exclude=(), ids=None):
+    """Returns (indices, scores) of the k best entries, skipping indices in `exclude`.
+
+    `ids` maps positions in `scores` back to catalog rows when only a subset was scored.
+    """
+    # Over-fetch by the number of exclusions and drop them, rather than copying scores
+    exclude = set(exclude)
+    order = top_k(scores, k + len(exclude))
+    indices = order if ids is None else ids[order]
+    keep = np.array([index not in exclude for index in indices.tolist()], dtype=bool)
+    return indices[keep][:k], scores[order][keep][:k]
+
+
+def top_k_many(matrix, queries, k, max_block=1 << 24):
+    """Returns (indices, scores), each of shape (len(queries), k), for many normalized queries at once.
+
+    Scores come from one matrix multiply per block of queries; blocks are sized so the
+    score matrix never holds more than `max_block` values.
+    """
+    k = min(k, len(matrix))
+    indices = np.empty((len(queries), k), dtype=np.int64)
+    scores = np.empty((len(queries), k), dtype=np.float32)
+    block = max(1, max_block // max(1, len(matrix)))
+    for start in range(0, len(queries), block):
+        block_scores = queries[start:start + block] @ matrix.T
+        for i, row_scores in enumerate(block_scores, start):
+            indices[i] = top_k(row_scores, k)
+            scores[i] = row_scores[indices[i]]
+    return indices, scores
+
+
+class ExactIndex:
+    """Brute-force top-k search: one matrix-vector product over the whole catalog."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def query(self, vector, k=5, exclude=()):
+        """Returns (indices, similarities) of the k rows most similar to a normalized `vector`."""
+        return select_top_k(self.matrix @ vector, k, exclude)
+
+
+class LSHIndex(ExactIndex):
+    """Approximate top-k search using random-hyperplane locality-sensitive hashing.
+
+    Every table hashes each vector to an `n_bits` signature (which side of each random
+    hyperplane it falls on). A query is only scored against the rows sharing a bucket
+    with it. `probes` is the recall knob: besides its own bucket, the query also visits
+    the buckets whose signature differs in the `probes` least confident bits. More tables
+    or more probes give higher recall at the cost of scanning more candidates.
+    """
+
+    def __init__(self, matrix, n_tables=8, n_bits=16, probes=2, seed=42):
+        super().__init__(matrix)
+        self.probes = probes
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, matrix.shape[1], n_bits)).astype(np.float32)
+        self.powers = (1 << np.arange(n_bits)).astype(np.int64)
+        # Scaled features all sit in the positive orthant, so hash them around their mean;
+        # hyperplanes through the origin would otherwise put nearly everything in one bucket
+        self.center = matrix.mean(axis=0)
+        centered = matrix - self.center
+        self.tables = [self._build_table(self._signatures(centered @ planes)) for planes in self.planes]
+
+    def _signatures(self, projections):
+        return (projections > 0).astype(np.int64) @ self.powers
+
+    @staticmethod
+    def _build_table(signatures):
+        # Bucket rows by signature: one sort, then slices into `order` per bucket
+        order = np.argsort(signatures, kind='stable')
+        keys, starts = np.unique(signatures[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        return {int(key): order[start:end] for key, start, end in zip(keys, starts, ends)}
+
+    def candidates(self, vector):
+        """Returns the indices of all rows sharing a (probed) bucket with `vector`."""
+        found = []
+        vector = vector - self.center
+        for planes, table in zip(self.planes, self.tables):
+            projection = vector @ planes
+            signature = int(self._signatures(projection))
+            keys = [signature]
+            # Flip the bits whose hyperplane the query lies closest to
+            for bit in np.argsort(np.abs(projection))[:self.probes]:
+                keys += [key ^ int(self.powers[bit]) for key in keys]
+            found.extend(table[key] for key in keys if key in table)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, vector, k=5, exclude=()):
+        candidates = self.candidates(vector)
+        return select_top_k(self.matrix[candidates] @ vector, k, exclude, ids=candidates)
+
+
+INDEXES = {
+    'exact': ExactIndex,
+    'lsh': LSHIndex,
+}
+
+
+def build_index(matrix, kind='exact', **options):
+    """Builds the top-k index named `kind` ('exact' or 'lsh') over an L2-normalized matrix."""
+    if kind not in INDEXES:
+        raise ValueError(f"Unknown index type '{kind}'. Choose one of: {', '.join(INDEXES)}")
+    return INDEXES[kind](matrix, **options)
@@ -0,0 +1,169 @@
+import itertools
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import spotipy
+from requests import Session
+from requests.adapters import HTTPAdapter
+from spotipy.oauth2 import SpotifyClientCredentials
+
+# How long a found link, and a "no such track" answer, are trusted before asking Spotify again
+LINK_TTL = 30 * 24 * 60 * 60
+MISSING_LINK_TTL = 24 * 60 * 60
+
+# Background prefetch: tracks looked up per catalog load, and Spotify searches per second
+PREFETCH_LIMIT = 2000
+PREFETCH_RATE = 10.0
+
+
+def make_spotify_client(client_id, client_secret, max_connections=8):
+    """Creates a Spotify client whose HTTP connection pool holds at most `max_connections` sockets."""
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True)
+    session.mount('https://', adapter)
+    return spotipy.Spotify(
+        auth_manager=SpotifyClientCredentials(client_id=client_id, client_secret=client_secret),
+        requests_session=session,
+    )
+
+
+def search_spotify_link(client, track_name, artist_name):
+    """Looks up the Spotify URL of a track, or None if Spotify does not know it."""
+    query = f"track:{track_name} artist:{artist_name}"
+    results = client.search(q=query, type="track", limit=1)
+
+    if results["tracks"]["items"]:
+        return results["tracks"]["items"][0]["external_urls"]["spotify"]
+    return None
+
+
+class LinkCache:
+    """Persistent (name, artist) -> Spotify URL cache stored in SQLite.
+
+    Tracks Spotify could not find are stored too (with a NULL URL) so they are not
+    searched again on every request; they expire after `missing_ttl` seconds.
+    """
+
+    def __init__(self, path, ttl=LINK_TTL, missing_ttl=MISSING_LINK_TTL):
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS links ("
+                "name TEXT NOT NULL, artist TEXT NOT NULL, url TEXT, fetched_at REAL NOT NULL, "
+                "PRIMARY KEY (name, artist))"
+            )
+
+    def get(self, name, artist):
+        """Returns (found, url). `found` is False when the pair is unknown or its entry expired."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT url, fetched_at FROM links WHERE name = ? AND artist = ?", (name, artist)
+            ).fetchone()
+        if row is None:
+            return False, None
+        url, fetched_at = row
+        ttl = self.ttl if url is not None else self.missing_ttl
+        if time.time() - fetched_at > ttl:
+            return False, None
+        return True, url
+
+    def set(self, name, artist, url):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO links (name, artist, url, fetched_at) VALUES (?, ?, ?, ?)",
+                (name, artist, url, time.time()),
+            )
+
+
+class LinkResolver:
+    """Resolves Spotify links through the cache, searching Spotify concurrently for misses."""
+
+    def __init__(self, client, cache, max_workers=8):
+        self.client = client
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='spotify-links')
+        self.lock = threading.Lock()
+        self.pending = {}  # (name, artist) -> Future, so one track is never searched twice at once
+        self.prefetch_stop = None  # Set to stop the running prefetch
+
+    def _fetch(self, name, artist):
+        try:
+            url = search_spotify_link(self.client, name, artist)
+        except Exception as e:
+            # Network and API errors are not cached; the next request retries
+            print(f"Error fetching Spotify link for {name} by {artist}: {e}")
+            return None
+        self.cache.set(name, artist, url)
+        return url
+
+    def _submit(self, name, artist):
+        key = (name, artist)
+        with self.lock:
+            future = self.pending.get(key)
+            created = future is None
+            if created:
+                future = self.executor.submit(self._fetch, name, artist)
+                self.pending[key] = future
+        if created:
+            # Outside the lock: the callback runs right away if the search already finished
+            future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self.lock:
+            self.pending.pop(key, None)
+
+    def resolve(self, name, artist):
+        return self.resolve_many([(name, artist)])[0]
+
+    def resolve_many(self, pairs):
+        """Returns the Spotify URL (or None) for each (name, artist) pair, in order."""
+        results = []
+        for name, artist in pairs:
+            found, url = self.cache.get(name, artist)
+            results.append(url if found else self._submit(name, artist))
+        return [result.result() if isinstance(result, Future) else result for result in results]
+
+    def prefetch(self, pairs, limit=PREFETCH_LIMIT, rate=PREFETCH_RATE, batch_size=20):
+        """Resolves the first `limit` pairs in the background, searching Spotify at most `rate` times per second.
+
+        Pairs already cached cost nothing. Starting a prefetch stops the previous one.
+        """
+        stop = threading.Event()
+        with self.lock:
+            if self.prefetch_stop is not None:
+                self.prefetch_stop.set()
+            self.prefetch_stop = stop
+
+        def resolve(batch):
+            started = time.monotonic()
+            try:
+                self.resolve_many(batch)
+            except RuntimeError:
+                # The executor is shut down: the interpreter is exiting
+                return False
+            # Waits out the rest of the batch's share of the rate; False once stopped
+            return not stop.wait(max(0.0, len(batch) / rate - (time.monotonic() - started)))
+
+        def run():
+            batch = []
+            for name, artist in itertools.islice(pairs, limit):
+                if stop.is_set():
+                    return
+                if not self.cache.get(name, artist)[0]:
+                    batch.append((name, artist))
+                if len(batch) == batch_size:
+                    if not resolve(batch):
+                        return
+                    batch = []
+            if batch:
+                resolve(batch)
+
+        thread = threading.Thread(target=run, name='spotify-links-prefetch', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,111 @@
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+from fuzzywuzzy import fuzz, utils
+
+
+def normalize_title(title):
+    """Normalizes a title the same way fuzzywuzzy does before scoring (lowercase, punctuation stripped)."""
+    return utils.full_process(str(title))
+
+
+def trigrams(text):
+    """Returns the set of character trigrams of `text`, padded so short words still produce some."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _find(table, key):
+    """Returns the position of `key` in the sorted sequence `table`, or None."""
+    position = bisect_left(table, key)
+    if position < len(table) and table[position] == key:
+        return position
+    return None
+
+
+class TitleIndex:
+    """Fuzzy and prefix search over song titles, built once per catalog.
+
+    A character-trigram inverted index shortlists the titles sharing the most trigrams
+    with the query; only that shortlist is scored with `fuzz.WRatio`, the scorer
+    `process.extractOne` uses. Results are cached in an LRU keyed by normalized query.
+
+    The index is held in flat arrays (sorted titles, sorted trigrams and a CSR posting
+    list) so it can be stored in a compiled catalog and memory-mapped. Use
+    `TitleIndex.build(names)` to index a list of names.
+    """
+
+    def __init__(self, names, titles, title_rows, grams, gram_offsets, postings, shortlist=50, cache_size=4096):
+        self.names = names
+        self.titles = titles  # Distinct normalized titles, sorted
+        self.title_rows = title_rows  # First catalog row with each title
+        self.grams = grams  # Distinct trigrams, sorted
+        self.gram_offsets = gram_offsets  # Titles containing grams[i] are postings[gram_offsets[i]:gram_offsets[i + 1]]
+        self.postings = postings
+        self.shortlist = shortlist
+        self._match = lru_cache(maxsize=cache_size)(self._best_match)
+
+    @classmethod
+    def build(cls, names, **options):
+        # Index each distinct normalized title once, remembering its first row
+        # (`process.extractOne` also returns the first of equally scored rows)
+        first_rows = {}
+        for row, name in enumerate(names):
+            first_rows.setdefault(normalize_title(name), row)
+        titles = sorted(first_rows)
+        title_rows = np.array([first_rows[title] for title in titles], dtype=np.int64)
+
+        postings = {}
+        for title_id, title in enumerate(titles):
+            for gram in trigrams(title):
+                postings.setdefault(gram, []).append(title_id)
+        grams = sorted(postings)
+        gram_offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum([len(postings[gram]) for gram in grams], out=gram_offsets[1:])
+        flat_postings = np.fromiter(chain.from_iterable(postings[gram] for gram in grams), dtype=np.int32, count=gram_offsets[-1])
+        return cls(names, titles, title_rows, grams, gram_offsets, flat_postings, **options)
+
+    def match(self, query):
+        """Returns (name, score, row) for the best matching title, or None if nothing is similar."""
+        return self._match(normalize_title(query))
+
+    def _best_match(self, query):
+        if not query:
+            return None
+        title_id = _find(self.titles, query)
+        if title_id is not None:
+            row = int(self.title_rows[title_id])
+            return self.names[row], 100, row
+
+        hits = []
+        for gram in trigrams(query):
+            gram_id = _find(self.grams, gram)
+            if gram_id is not None:
+                hits.append(self.postings[self.gram_offsets[gram_id]:self.gram_offsets[gram_id + 1]])
+        if not hits:
+            return None
+        title_ids, counts = np.unique(np.concatenate(hits), return_counts=True)
+        if len(title_ids) > self.shortlist:
+            title_ids = title_ids[np.argpartition(-counts, self.shortlist - 1)[:self.shortlist]]
+
+        best = None
+        for title_id in title_ids.tolist():
+            score = fuzz.WRatio(query, self.titles[title_id])
+            row = int(self.title_rows[title_id])
+            if best is None or score > best[1] or (score == best[1] and row < best[2]):
+                best = (self.names[row], score, row)
+        return best
+
+    def prefix(self, query, limit=20):
+        """Returns up to `limit` song names whose normalized title starts with `query`."""
+        query = normalize_title(query)
+        results = []
+        title_id = bisect_left(self.titles, query)
+        while title_id < len(self.titles) and len(results) < limit:
+            if not self.titles[title_id].startswith(query):
+                break
+            results.append(self.names[int(self.title_rows[title_id])])
+            title_id += 1
+        return results
@@ -1,9 +1,12 @@
 import pylast
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 import csv
 import os
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from spotify_links import make_spotify_client
+from catalog import compile_catalog
 
 load_dotenv()
 
@@ -15,54 +18,110 @@ LASTFM_API_SECRET = os.getenv("LASTFM_API_SECRET")
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 
-# Initialize Last.fm network
-network = pylast.LastFMNetwork(api_key=LASTFM_API_KEY, api_secret=LASTFM_API_SECRET)
+AUDIO_FEATURES = ["danceability", "energy", "key", "loudness", "mode", "speechiness", "acousticness", "instrumentalness", "liveness", "valence", "tempo"]
+FIELDNAMES = ["name", "artist"] + AUDIO_FEATURES
 
-# Initialize Spotify client
-sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=SPOTIFY_CLIENT_ID, client_secret=SPOTIFY_CLIENT_SECRET))
+# Spotify accepts at most 100 track IDs per audio_features request
+AUDIO_FEATURES_BATCH_SIZE = 100
 
-def get_top_tracks(limit=50):
+# Parallel Spotify searches (and HTTP connections) while resolving track IDs
+MAX_WORKERS = 8
+
+def get_lastfm_network():
+    return pylast.LastFMNetwork(api_key=LASTFM_API_KEY, api_secret=LASTFM_API_SECRET)
+
+def get_spotify_client():
+    return make_spotify_client(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, max_connections=MAX_WORKERS)
+
+def get_top_tracks(network, limit=50):
     chart = network.get_top_tracks(limit=limit)
-    return [(track.item.get_name(), track.item.get_artist().get_name()) for track in chart]
+    tracks = [(track.item.get_name(), track.item.get_artist().get_name()) for track in chart]
+    return list(dict.fromkeys(tracks))  # Drop duplicates, keep chart order
 
-def get_audio_features(track_name, artist_name):
+def get_track_id(sp, track_name, artist_name):
     query = f"track:{track_name} artist:{artist_name}"
     results = sp.search(q=query, type="track", limit=1)
-    
+
     if results["tracks"]["items"]:
-        track_id = results["tracks"]["items"][0]["id"]
-        audio_features = sp.audio_features(track_id)[0]
-        return audio_features
+        return results["tracks"]["items"][0]["id"]
     return None
 
-def update_songs_csv():
-    top_tracks = get_top_tracks()
-    
-    with open("songs.csv", "w", newline="") as csvfile:
-        fieldnames = ["name", "artist", "danceability", "energy", "key", "loudness", "mode", "speechiness", "acousticness", "instrumentalness", "liveness", "valence", "tempo"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for track_name, artist_name in top_tracks:
-            audio_features = get_audio_features(track_name, artist_name)
+def resolve_track_ids(sp, tracks, max_workers=MAX_WORKERS):
+    """Searches Spotify for all (name, artist) pairs concurrently. Returns {(name, artist): track_id}."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        track_ids = executor.map(lambda track: get_track_id(sp, *track), tracks)
+        return {track: track_id for track, track_id in zip(tracks, track_ids) if track_id}
+
+def get_audio_features(sp, track_ids):
+    """Fetches audio features for many track IDs, 100 per request. Returns {track_id: features}."""
+    track_ids = list(dict.fromkeys(track_ids))
+    features = {}
+    for start in range(0, len(track_ids), AUDIO_FEATURES_BATCH_SIZE):
+        batch = track_ids[start:start + AUDIO_FEATURES_BATCH_SIZE]
+        for track_id, audio_features in zip(batch, sp.audio_features(batch)):
             if audio_features:
-                writer.writerow({
-                    "name": track_name,
-                    "artist": artist_name,
-                    "danceability": audio_features["danceability"],
-                    "energy": audio_features["energy"],
-                    "key": audio_features["key"],
-                    "loudness": audio_features["loudness"],
-                    "mode": audio_features["mode"],
-                    "speechiness": audio_features["speechiness"],
-                    "acousticness": audio_features["acousticness"],
-                    "instrumentalness": audio_features["instrumentalness"],
-                    "liveness": audio_features["liveness"],
-                    "valence": audio_features["valence"],
-                    "tempo": audio_features["tempo"]
-                })
-    
-    print("songs.csv has been updated with the latest top tracks from Last.fm")
+                features[track_id] = audio_features
+    return features
+
+def read_catalog(path):
+    """Returns the rows of an existing songs.csv keyed by (name, artist), or {} if there is none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="") as csvfile:
+        return {(row["name"], row["artist"]): row for row in csv.DictReader(csvfile)}
+
+def is_complete(row):
+    return row is not None and all(row.get(feature) not in (None, "") for feature in AUDIO_FEATURES)
+
+def write_catalog(path, rows):
+    """Writes songs.csv to a temporary file first, then renames it over the old one in a single step."""
+    directory = os.path.dirname(os.path.abspath(path))
+    csvfile = tempfile.NamedTemporaryFile("w", newline="", dir=directory, suffix=".csv.tmp", delete=False)
+    try:
+        with csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(csvfile.name, path)
+    except BaseException:
+        os.remove(csvfile.name)
+        raise
+
+def update_songs_csv(path="songs.csv", limit=50, network=None, sp=None):
+    network = network or get_lastfm_network()
+    sp = sp or get_spotify_client()
+
+    top_tracks = get_top_tracks(network, limit=limit)
+    catalog = read_catalog(path)
+
+    # Only tracks that are new, or whose stored features are incomplete, go to Spotify
+    missing = [track for track in top_tracks if not is_complete(catalog.get(track))]
+    track_ids = resolve_track_ids(sp, missing)
+    audio_features = get_audio_features(sp, track_ids.values())
+
+    rows = []
+    fetched = 0
+    for track_name, artist_name in top_tracks:
+        row = catalog.get((track_name, artist_name))
+        track_id = track_ids.get((track_name, artist_name))
+        if track_id in audio_features:
+            row = {"name": track_name, "artist": artist_name}
+            row.update({feature: audio_features[track_id][feature] for feature in AUDIO_FEATURES})
+            fetched += 1
+        if is_complete(row):
+            rows.append(row)
+
+    write_catalog(path, rows)
+    # Also write the binary catalog the app memory-maps, so it does not re-import the CSV
+    compile_catalog(path)
+
+    print(f"{path} has been updated with the latest top tracks from Last.fm "
+          f"({len(rows)} tracks, {fetched} fetched from Spotify, {len(rows) - fetched} already in the catalog)")
+    return rows
 
 if __name__ == "__main__":
-    update_songs_csv()
+    parser = argparse.ArgumentParser(description="Refresh songs.csv with the current Last.fm top tracks.")
+    parser.add_argument("--limit", type=int, default=50, help="number of top tracks to fetch (default: 50)")
+    parser.add_argument("--output", default="songs.csv", help="catalog file to update (default: songs.csv)")
+    args = parser.parse_args()
+    update_songs_csv(path=args.output, limit=args.limit)
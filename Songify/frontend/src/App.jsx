@@ -37,8 +37,17 @@ function App() {
     setIsUpdating(true);
     setUpdateMessage('');
     try {
-      const response = await axios.post('http://localhost:5000/update_songs');
-      setUpdateMessage(response.data.message);
+      // The update runs in the background on the server; poll until it finishes
+      let response = await axios.post('http://localhost:5000/update_songs');
+      const statusUrl = `http://localhost:5000${response.data.status_url}`;
+      while (['queued', 'running'].includes(response.data.status)) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        response = await axios.get(statusUrl);
+      }
+      if (response.data.status !== 'succeeded') {
+        throw new Error(response.data.error);
+      }
+      setUpdateMessage('Songs updated successfully');
       fetchSongs();  // Refresh the song list
     } catch (err) {
       setUpdateMessage('Error: Failed to update songs');
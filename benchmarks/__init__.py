@@ -0,0 +1,4 @@
+"""Offline benchmarks and load tests for Songify, DocuReader, PredictionAlgorithm and BookShelf.
+
+Run with `python -m benchmarks.run`; see README.md.
+"""
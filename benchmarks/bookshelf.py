@@ -0,0 +1,53 @@
+"""BookShelf: /summary (cached, uncached and many clients on one book) and the streamed /summary/batch.
+
+The backend runs with its fake OpenAI clients (BOOKSHELF_FAKE_OPENAI=1), whose calls
+take MODEL_LATENCY seconds, and a summary cache in a temporary directory.
+"""
+import json
+import os
+import tempfile
+
+from .common import ServerThread, add_paths, load_test, result
+
+SUITE = "bookshelf"
+
+# Seconds each fake model call takes
+MODEL_LATENCY = 0.05
+
+
+def _book(number):
+    return {"title": f"Book {number}", "author": f"Author {number % 300}", "genre": "Fiction"}
+
+
+def run(quick=False):
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.update(BOOKSHELF_FAKE_OPENAI="1", BOOKSHELF_FAKE_LATENCY=str(MODEL_LATENCY),
+                          SUMMARY_CACHE_PATH=os.path.join(directory, "summaries.db"))
+        add_paths("BookShelf")
+        import backend
+
+        requests = 100 if quick else 500
+        headers = {"Content-Type": "application/json"}
+        with ServerThread(backend.app) as server:
+            for clients in (1, 16):
+                params = {"clients": clients}
+                # Every request a new book, then the same books again, then every client asking for one book
+                offset = clients * requests
+                samples, extra = load_test(server.port, lambda number: (
+                    "POST", "/summary", json.dumps(_book(offset + number)), headers), clients=clients, requests=requests)
+                records.append(result(SUITE, "load /summary", dict(params, cache="miss"), samples, **extra))
+                samples, extra = load_test(server.port, lambda number: (
+                    "POST", "/summary", json.dumps(_book(offset + number)), headers), clients=clients, requests=requests)
+                records.append(result(SUITE, "load /summary", dict(params, cache="hit"), samples, **extra))
+                samples, extra = load_test(server.port, lambda number: (
+                    "POST", "/summary", json.dumps(_book(-clients)), headers), clients=clients, requests=requests)
+                records.append(result(SUITE, "load /summary", dict(params, cache="one book"), samples, **extra))
+
+            for size in (10, 100) if quick else (10, 100, 1000):
+                body = json.dumps({"books": [_book(10 ** 6 + size + number) for number in range(size)]})
+                samples, extra = load_test(server.port, lambda number: ("POST", "/summary/batch", body, headers),
+                                           clients=1, requests=1)
+                records.append(result(SUITE, "load /summary/batch", {"books": size}, samples,
+                                      books_per_second=size / samples[0], **extra))
+    return records
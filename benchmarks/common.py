@@ -0,0 +1,154 @@
+"""Timing, result records and HTTP load testing shared by the benchmark suites.
+
+Every measurement becomes one result record:
+
+    {"suite": "songify", "benchmark": "recommend_songs", "params": {"songs": 10000},
+     "seconds": {"n": 200, "mean": ..., "p50": ..., "p95": ..., "p99": ..., "min": ..., "max": ...},
+     ...extra fields such as "throughput" (per second) or "errors"}
+
+compare.py matches records of two runs on (suite, benchmark, params).
+"""
+import http.client
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def add_paths(*relative_paths):
+    """Puts project directories (relative to the repository root) first on `sys.path`, like each app does."""
+    for relative_path in reversed(relative_paths):
+        sys.path.insert(0, os.path.join(ROOT, relative_path))
+
+
+def summarize(samples):
+    samples = np.asarray(samples, dtype=np.float64)
+    if not len(samples):
+        return {"n": 0}
+    return {
+        "n": int(len(samples)),
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "p99": float(np.percentile(samples, 99)),
+        "min": float(samples.min()),
+        "max": float(samples.max()),
+    }
+
+
+def measure(function, repeat=20, warmup=1, max_seconds=30.0):
+    """Calls `function()` `warmup` times untimed, then up to `repeat` times (stopping after `max_seconds`).
+
+    Returns the duration of each timed call in seconds.
+    """
+    for _ in range(warmup):
+        function()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (not samples or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def result(suite, benchmark, params, samples, **extra):
+    record = {"suite": suite, "benchmark": benchmark, "params": params, "seconds": summarize(samples)}
+    record.update(extra)
+    return record
+
+
+class ServerThread:
+    """Serves a WSGI app on a free localhost port from a background thread, one thread per request.
+
+        with ServerThread(app) as server:
+            load_test(server.port, ...)
+    """
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+
+        # One access log line per request would drown the results
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def _send(port, method, path, body, headers):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def load_test(port, make_request, clients=8, requests=400):
+    """Sends `requests` HTTP requests from `clients` concurrent clients; returns latency samples and counts.
+
+    `make_request(number)` returns (method, path, body, headers) for request `number`.
+    Responses are read to the end, so streamed responses count in full. Returns
+    (samples, extra) where extra has the throughput in requests per second and the
+    number of responses by status (connection failures count as status 0).
+    """
+    samples = [None] * requests
+    statuses = [0] * requests
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+
+    def client():
+        while True:
+            with counter_lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            method, path, body, headers = make_request(number)
+            started = time.perf_counter()
+            try:
+                statuses[number] = _send(port, method, path, body, headers)
+            except OSError:
+                statuses[number] = 0
+            samples[number] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for future in [executor.submit(client) for _ in range(clients)]:
+            future.result()
+    seconds = time.perf_counter() - started
+
+    counts = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    errors = sum(count for status, count in counts.items() if not status.startswith("2") and not status.startswith("3"))
+    return samples, {"clients": clients, "throughput": requests / seconds, "statuses": counts, "errors": errors}
+
+
+def multipart(field, filename, data, content_type="application/pdf"):
+    """Encodes one file upload as a multipart/form-data body; returns (body, headers)."""
+    boundary = uuid.uuid4().hex
+    body = b"".join([
+        f"--{boundary}\r\n".encode(),
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'.encode(),
+        f"Content-Type: {content_type}\r\n\r\n".encode(),
+        data,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ])
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
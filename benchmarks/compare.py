@@ -0,0 +1,61 @@
+"""Compares two benchmark runs and flags regressions.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+
+Results are matched on suite, benchmark and parameters. A result regressed when its
+median latency grew by more than `--threshold` (a fraction), or when a load test
+returned errors it did not before. Exits with status 1 if anything regressed.
+"""
+import argparse
+import json
+import sys
+
+
+def _key(record):
+    return record["suite"], record["benchmark"], json.dumps(record["params"], sort_keys=True)
+
+
+def compare(before, after, threshold=0.1):
+    """Returns (rows, regressed): one row per result present in both runs, and whether any regressed."""
+    previous = {_key(record): record for record in before["results"]}
+    rows = []
+    regressed = False
+    for record in after["results"]:
+        old = previous.get(_key(record))
+        if old is None or not old["seconds"].get("n") or not record["seconds"].get("n"):
+            continue
+        change = record["seconds"]["p50"] / old["seconds"]["p50"] - 1 if old["seconds"]["p50"] else 0.0
+        new_errors = record.get("errors", 0) > old.get("errors", 0)
+        worse = change > threshold or new_errors
+        regressed = regressed or worse
+        rows.append((record, old, change, worse))
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed growth of the median latency (default: 0.1)")
+    args = parser.parse_args()
+
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    for run in (before, after):
+        environment = run["environment"]
+        print(f"{(environment['commit'] or '?')[:10]}  python {environment['python']}, {environment['cpus']} CPUs, {environment['started']}")
+
+    rows, regressed = compare(before, after, args.threshold)
+    for record, old, change, worse in rows:
+        params = ", ".join(f"{key}={value}" for key, value in record["params"].items())
+        line = (f"{record['suite']:>10} {record['benchmark']:<22} {params:<32} "
+                f"{old['seconds']['p50'] * 1000:10.3f} -> {record['seconds']['p50'] * 1000:10.3f} ms  {change:+7.1%}")
+        if "throughput" in record:
+            line += f"  {old['throughput']:8.1f} -> {record['throughput']:8.1f} req/s"
+        print(line + ("  REGRESSED" if worse else ""))
+    print(f"{len(rows)} results compared, {sum(worse for *_, worse in rows)} regressed")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""DocuReader docmaker: table parsing and the /upload endpoint, on generated PDFs of increasing size."""
+import os
+
+from .common import ServerThread, add_paths, load_test, measure, multipart, result
+from .workloads import table_pdf
+
+SUITE = "docmaker"
+SIZES = [1000, 10000, 100000]
+QUICK_SIZES = [1000, 10000]
+
+# Rows in the PDF sent to /upload under load; the page renders every row
+UPLOAD_ROWS = 1000
+
+
+def run(quick=False):
+    add_paths(os.path.join("docureader", "docmaker"))
+    import app
+    from table_parser import iter_rows
+
+    records = []
+    for size in QUICK_SIZES if quick else SIZES:
+        path = table_pdf(size)
+        parsed = []
+        samples = measure(lambda: parsed.append(sum(1 for _ in iter_rows(path))), repeat=3)
+        records.append(result(SUITE, "iter_rows", {"rows": size}, samples, rows_parsed=parsed[-1],
+                              rows_per_second=size / (sum(samples) / len(samples))))
+
+    with open(table_pdf(UPLOAD_ROWS), "rb") as pdf:
+        body, headers = multipart("file", "hospitals.pdf", pdf.read())
+    requests = 20 if quick else 100
+    with ServerThread(app.app) as server:
+        for clients in (1, 4):
+            samples, extra = load_test(server.port, lambda number: ("POST", "/upload", body, headers),
+                                       clients=clients, requests=requests)
+            records.append(result(SUITE, "load /upload", {"rows": UPLOAD_ROWS, "clients": clients}, samples, **extra))
+    return records
@@ -0,0 +1,99 @@
+"""Local stand-ins for the external services, so every benchmark runs offline.
+
+- `FakeSpotify` for `spotipy.Spotify` (track search and audio features).
+- `FakeLastFM` for `pylast.LastFMNetwork` (top tracks chart).
+- `fake_yahoo_download` for `market_data.download_from_yahoo` (yfinance).
+
+OpenAI is faked by the apps themselves: BookShelf with BOOKSHELF_FAKE_OPENAI=1 and
+the DocuReader Q&A app with QNA_FAKE_OPENAI=1.
+
+All answers are derived from hashes of the request, so they are the same on every run.
+"""
+import hashlib
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+AUDIO_FEATURES = ["danceability", "energy", "key", "loudness", "mode", "speechiness", "acousticness", "instrumentalness",
+                  "liveness", "valence", "tempo"]
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class FakeSpotify:
+    """Answers `search` and `audio_features` like spotipy, after `latency` seconds per call."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def search(self, q, type="track", limit=1, **options):
+        self.calls += 1
+        time.sleep(self.latency)
+        track_id = _digest(q)[:22]
+        item = {"id": track_id, "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"}}
+        return {"tracks": {"items": [item][:limit]}}
+
+    def audio_features(self, tracks):
+        self.calls += 1
+        time.sleep(self.latency)
+        features = []
+        for track_id in tracks:
+            rng = np.random.default_rng(int(_digest(track_id)[:12], 16))
+            values = dict(zip(AUDIO_FEATURES, rng.random(len(AUDIO_FEATURES)).round(4).tolist()))
+            values.update(key=int(rng.integers(0, 12)), mode=int(rng.integers(0, 2)),
+                          loudness=round(-20 * values["loudness"], 3), tempo=round(60 + 120 * values["tempo"], 3))
+            features.append(values)
+        return features
+
+
+class _Named:
+    def __init__(self, name, artist=None):
+        self.name = name
+        self.artist = artist
+
+    def get_name(self):
+        return self.name
+
+    def get_artist(self):
+        return _Named(self.artist)
+
+
+class FakeLastFM:
+    """Answers `get_top_tracks` like pylast, from a chart of `chart_size` made-up tracks."""
+
+    def __init__(self, chart_size=1000, latency=0.0):
+        self.chart_size = chart_size
+        self.latency = latency
+
+    def get_top_tracks(self, limit=50, **options):
+        time.sleep(self.latency)
+        return [SimpleNamespace(item=_Named(f"Track {number}", f"Artist {number % 97}"), weight=self.chart_size - number)
+                for number in range(min(limit, self.chart_size))]
+
+
+def synthetic_prices(n_rows, seed=0, start="1990-01-01", freq="B"):
+    """A geometric random walk with trending regimes, as a frame with Date, Open, High, Low, Close and Volume."""
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.002, n_rows // 250 + 1), 250)[:n_rows]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.01, n_rows)))
+    spread = close * rng.uniform(0, 0.01, n_rows)
+    return pd.DataFrame({
+        "Date": pd.date_range(start, periods=n_rows, freq=freq),
+        "Open": close + rng.normal(0, 0.5, n_rows) * spread,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 10_000_000, n_rows).astype(float),
+    })
+
+
+def fake_yahoo_download(symbol, start, end, interval):
+    """Same contract as `market_data.download_from_yahoo`: business days in [start, end), seeded by the symbol."""
+    full = synthetic_prices(20000, seed=int(_digest(symbol)[:8], 16), start="1950-01-02")
+    dates = full["Date"]
+    return full[(dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))].reset_index(drop=True)
@@ -0,0 +1,77 @@
+"""PredictionAlgorithm: indicator kernels, the indicator engine and the market data store.
+
+Price histories are synthetic; the store downloads from `fake_yahoo_download`
+instead of Yahoo Finance, into a temporary directory.
+"""
+import itertools
+import tempfile
+
+import pandas as pd
+
+from .common import add_paths, measure, result
+from .fakes import fake_yahoo_download
+from .workloads import price_panel, prices
+
+SUITE = "prediction"
+SIZES = [1000, 10000, 100000, 1000000]
+QUICK_SIZES = [1000, 10000]
+
+# Symbols in the panel benchmark, and its length in bars
+PANEL_SYMBOLS = 100
+PANEL_BARS = 5000
+
+
+def run(quick=False):
+    add_paths("PredictionAlgorithm")
+    from indicators import DEFAULT_PARAMS, IndicatorEngine, bollinger_bands, macd, panel_features, rsi
+    from market_data import MarketDataStore
+
+    params = DEFAULT_PARAMS
+    feature_args = [params[name] for name in ('rsi_period', 'macd_short_period', 'macd_long_period',
+                                              'macd_signal_period', 'bollinger_period', 'bollinger_std_dev')]
+    records = []
+    for size in QUICK_SIZES if quick else SIZES:
+        bars = {"bars": size}
+        history = prices(size)
+        close = history["Close"].to_numpy()
+        records.append(result(SUITE, "rsi", bars, measure(lambda: rsi(close, params['rsi_period']))))
+        records.append(result(SUITE, "macd", bars, measure(lambda: macd(close, *feature_args[1:4]))))
+        records.append(result(SUITE, "bollinger_bands", bars, measure(lambda: bollinger_bands(close, *feature_args[4:]))))
+        records.append(result(SUITE, "panel_features", bars, measure(lambda: panel_features(close, *feature_args))))
+
+        # A new engine computes everything; the same parameters again are served from its cache
+        records.append(result(SUITE, "engine.features", dict(bars, cache="cold"),
+                              measure(lambda: IndicatorEngine(history).features(*feature_args), repeat=5)))
+        engine = IndicatorEngine(history)
+        records.append(result(SUITE, "engine.features", dict(bars, cache="warm"),
+                              measure(lambda: engine.features(*feature_args), repeat=5)))
+
+        # One new bar at a time, as a live feed delivers them
+        step = history["Date"].iloc[-1] - history["Date"].iloc[-2]
+        new_bars = itertools.count(1)
+
+        def append_bar():
+            bar = history.iloc[[-1]].copy()
+            bar["Date"] += step * next(new_bars)
+            engine.append(bar)
+
+        records.append(result(SUITE, "engine.append", bars, measure(append_bar, repeat=20)))
+
+    panel_size = {"bars": PANEL_BARS, "symbols": PANEL_SYMBOLS}
+    panel = price_panel(PANEL_BARS, PANEL_SYMBOLS)
+    records.append(result(SUITE, "panel_features", panel_size, measure(lambda: panel_features(panel, *feature_args))))
+
+    with tempfile.TemporaryDirectory() as directory:
+        symbols = itertools.count()
+        start, end = "2000-01-01", pd.Timestamp.now().strftime('%Y-%m-%d')
+
+        def cold_load():
+            MarketDataStore(root=directory, fetch=fake_yahoo_download).load(f"SYM{next(symbols)}", start, end)
+
+        store = MarketDataStore(root=directory, fetch=fake_yahoo_download)
+        store.load("WARM", start, end)
+        span = {"start": start}
+        records.append(result(SUITE, "MarketDataStore.load", dict(span, store="cold"), measure(cold_load, repeat=5)))
+        records.append(result(SUITE, "MarketDataStore.load", dict(span, store="warm"),
+                              measure(lambda: store.load("WARM", start, end), repeat=20)))
+    return records
@@ -0,0 +1,68 @@
+"""DocuReader Q&A: PDF text extraction, document upload and /ask, on generated PDFs of increasing size.
+
+The app runs with its fake OpenAI client (QNA_FAKE_OPENAI=1) and without the answer
+cache, so every question goes through retrieval and the (instant) model call.
+Documents and their chunk indexes are stored in a temporary directory.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from urllib.parse import urlencode
+
+from .common import ServerThread, add_paths, load_test, measure, result
+from .workloads import table_pdf
+
+SUITE = "qna"
+SIZES = [1000, 10000, 100000]
+QUICK_SIZES = [1000, 10000]
+
+QUESTIONS = [
+    "Which hospitals specialize in cardiology?",
+    "What is the phone number of Apollo Hospital?",
+    "Which hospitals are in Pune?",
+    "Where is the pediatrics department located?",
+    "Who can I email about oncology?",
+]
+
+
+def _import_app(directory):
+    os.environ.update(QNA_FAKE_OPENAI="1", QNA_ANSWER_CACHE="none",
+                      QNA_DOCUMENT_DIR=os.path.join(directory, "documents"))
+    add_paths(os.path.join("docureader", "qna-from-doc"))
+    import app
+    return app
+
+
+def run(quick=False):
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        app = _import_app(directory)
+        from pdf_text import extract_text
+
+        client = app.app.test_client()
+        for size in QUICK_SIZES if quick else SIZES:
+            params = {"rows": size}
+            path = table_pdf(size)
+            with open(path, "rb") as pdf:
+                data = pdf.read()
+            doc_id = hashlib.sha256(data).hexdigest()
+            records.append(result(SUITE, "extract_text", params, measure(lambda: extract_text(path), repeat=5),
+                                  megabytes=len(data) / 1e6))
+
+            def upload():
+                response = client.post("/upload", data={"file": (io.BytesIO(data), "document.pdf")})
+                assert response.status_code == 302, response.status_code
+
+            # The first upload extracts and indexes the document, later ones find it by its hash
+            records.append(result(SUITE, "upload", dict(params, document="new"), measure(upload, repeat=1, warmup=0)))
+            records.append(result(SUITE, "upload", dict(params, document="known"), measure(upload, repeat=10)))
+
+            requests = 100 if quick else 500
+            with ServerThread(app.app) as server:
+                for clients in (1, 8):
+                    samples, extra = load_test(server.port, lambda number: (
+                        "POST", "/ask", urlencode({"doc_id": doc_id, "question": QUESTIONS[number % len(QUESTIONS)]}),
+                        {"Content-Type": "application/x-www-form-urlencoded"}), clients=clients, requests=requests)
+                    records.append(result(SUITE, "load /ask", dict(params, clients=clients), samples, **extra))
+    return records
@@ -0,0 +1,93 @@
+"""Runs the benchmark suites and writes their results as JSON.
+
+    python -m benchmarks.run --quick --output before.json
+    python -m benchmarks.run --suite songify --suite qna --output after.json
+
+Each suite runs in a fresh interpreter: the projects' modules share names (`app`,
+`fake_openai`), and a fresh interpreter also keeps one suite's caches, threads and
+worker pools from affecting the next. Run from the repository root.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import import_module
+
+from .common import ROOT
+
+SUITES = ["songify", "qna", "docmaker", "prediction", "bookshelf"]
+
+
+def run_suite(name, quick=False):
+    """Runs one suite in a new interpreter and returns its result records."""
+    # A subprocess rather than a multiprocessing worker: a worker joins its children before
+    # the suite's process pools (PDF extraction) are shut down, and never exits
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.json")
+        command = [sys.executable, "-m", "benchmarks.run", "--suite", name, "--in-process", "--output", path]
+        subprocess.run(command + (["--quick"] if quick else []), cwd=ROOT, check=True)
+        with open(path) as results:
+            return json.load(results)["results"]
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def print_records(records):
+    for record in records:
+        seconds = record["seconds"]
+        params = ", ".join(f"{key}={value}" for key, value in record["params"].items())
+        line = (f"{record['suite']:>10} {record['benchmark']:<22} {params:<32} n={seconds['n']:<5} "
+                f"p50={seconds['p50'] * 1000:10.3f} ms  p95={seconds['p95'] * 1000:10.3f} ms")
+        if "throughput" in record:
+            line += f"  {record['throughput']:8.1f} req/s  errors={record['errors']}"
+        print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmarks and load tests.")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="suite to run (repeatable; default: all)")
+    parser.add_argument("--quick", action="store_true", help="small workloads only, for a run of a few minutes")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--in-process", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.in_process:
+        # One suite, in this interpreter, on behalf of run_suite
+        records = import_module(f"benchmarks.{args.suite[0]}").run(quick=args.quick)
+        with open(args.output, "w") as output:
+            json.dump({"results": records}, output)
+        return records
+
+    report = {"environment": environment(), "quick": args.quick, "results": []}
+    for name in args.suite or SUITES:
+        started = time.perf_counter()
+        records = run_suite(name, quick=args.quick)
+        print_records(records)
+        print(f"{name}: {len(records)} results in {time.perf_counter() - started:.0f}s", flush=True)
+        report["results"] += records
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
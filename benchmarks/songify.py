@@ -0,0 +1,128 @@
+"""Songify: catalog compile and load, title matching, similarity search, /recommend and /songs.
+
+The app is imported from a temporary directory holding a generated songs.csv, with
+the Spotify client replaced by `FakeSpotify` and the background link prefetch turned
+off (SPOTIFY_PREFETCH_LIMIT=0), so /recommend resolves its links on demand like a cold cache would. The
+catalog refresh runs against `FakeLastFM` and `FakeSpotify`.
+"""
+import itertools
+import json
+import os
+import tempfile
+from urllib.parse import quote
+
+import numpy as np
+
+from .common import ServerThread, add_paths, load_test, measure, result
+from .fakes import FakeLastFM, FakeSpotify
+from .workloads import song_titles, songs_csv
+
+SUITE = "songify"
+SIZES = [10000, 100000, 1000000]
+QUICK_SIZES = [10000]
+
+# Seconds each fake Spotify call takes; links are cached after the first lookup
+SPOTIFY_LATENCY = 0.02
+
+
+def _import_app(directory):
+    add_paths(os.path.join("Songify", "backend"))
+    import spotify_links
+
+    spotify_links.make_spotify_client = lambda *args, **kwargs: FakeSpotify(latency=SPOTIFY_LATENCY)
+    os.environ["SPOTIFY_PREFETCH_LIMIT"] = "0"
+    os.chdir(directory)
+    import app
+    return app
+
+
+def _catalog_benchmarks(app, size, queries):
+    from catalog import compile_catalog, open_catalog
+    from similarity import build_index
+
+    params = {"songs": size}
+    records = [result(SUITE, "compile_catalog", params, measure(lambda: compile_catalog("songs.csv"), repeat=1, warmup=0))]
+    records.append(result(SUITE, "open_catalog", params, measure(lambda: open_catalog("songs.catalog"), repeat=5)))
+    app.load_songs()
+    songs = app.catalog
+
+    numbers = itertools.count()
+    records.append(result(SUITE, "fuzzy_match", params,
+                          measure(lambda: app.find_song(songs, queries[next(numbers) % len(queries)]), repeat=200)))
+
+    rng = np.random.default_rng(0)
+    for kind in ("exact", "lsh"):
+        index = songs.index if kind == "exact" else build_index(songs.vectors, "lsh")
+
+        def query():
+            row = int(rng.integers(size))
+            index.query(songs.vectors[row], k=5, exclude=[row])
+
+        records.append(result(SUITE, f"similarity_{kind}", params, measure(query, repeat=200)))
+    return records
+
+
+def _endpoint_benchmarks(app, size, queries, quick):
+    params = {"songs": size}
+    client = app.app.test_client()
+    numbers = itertools.count()
+
+    def recommend():
+        response = client.post("/recommend", json={"song": queries[next(numbers) % len(queries)]})
+        assert response.status_code == 200, response.status_code
+
+    # The first pass over the queries looks their links up in the (fake) Spotify, later passes hit the link cache
+    records = [result(SUITE, "recommend_songs", dict(params, links="cold"), measure(recommend, repeat=len(queries), warmup=0))]
+    records.append(result(SUITE, "recommend_songs", dict(params, links="cached"), measure(recommend, repeat=len(queries))))
+
+    requests = 100 if quick else 1000
+    with ServerThread(app.app) as server:
+        for clients in (1, 8):
+            samples, extra = load_test(server.port, lambda number: (
+                "POST", "/recommend", json.dumps({"song": queries[number % len(queries)]}),
+                {"Content-Type": "application/json"}), clients=clients, requests=requests)
+            records.append(result(SUITE, "load /recommend", dict(params, clients=clients), samples, **extra))
+
+            prefixes = [query[:3] for query in queries]
+            samples, extra = load_test(server.port, lambda number: (
+                "GET", f"/songs?q={quote(prefixes[number % len(prefixes)])}", None, None),
+                clients=clients, requests=requests)
+            records.append(result(SUITE, "load /songs?q", dict(params, clients=clients), samples, **extra))
+    return records
+
+
+def _refresh_benchmarks(directory, quick):
+    from update_songs import update_songs_csv
+
+    chart_size = 200 if quick else 1000
+    params = {"chart": chart_size}
+    path = os.path.join(directory, "refresh.csv")
+    spotify = FakeSpotify(latency=SPOTIFY_LATENCY)
+
+    def refresh():
+        update_songs_csv(path, limit=chart_size, network=FakeLastFM(chart_size), sp=spotify)
+
+    # Cold: every track goes to Spotify; warm: the catalog is complete and nothing is fetched
+    records = [result(SUITE, "update_songs", dict(params, catalog="cold"), measure(refresh, repeat=1, warmup=0),
+                      spotify_calls=spotify.calls)]
+    calls = spotify.calls
+    records.append(result(SUITE, "update_songs", dict(params, catalog="warm"), measure(refresh, repeat=3, warmup=0),
+                          spotify_calls=spotify.calls - calls))
+    return records
+
+
+def run(quick=False):
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = QUICK_SIZES if quick else SIZES
+        songs_csv(directory, sizes[0])
+        app = _import_app(directory)
+        for size in sizes:
+            songs_csv(directory, size)
+            # Queries with a typo or two, for songs spread over the whole catalog
+            titles = song_titles(size)
+            queries = [titles[row].lower().replace("e", "a", 1) for row in range(0, size, max(1, size // 50))][:50]
+            records += _catalog_benchmarks(app, size, queries)
+            records += _endpoint_benchmarks(app, size, queries, quick)
+        records += _refresh_benchmarks(directory, quick)
+    return records
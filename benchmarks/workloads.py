@@ -0,0 +1,91 @@
+"""Seeded synthetic inputs for the benchmarks: song catalogs, table PDFs and price histories.
+
+The same size and seed always give the same data, so two runs of the suite measure
+the same work. Generated files are kept in a cache directory (BENCHMARK_CACHE_DIR,
+default: a directory under the system temp dir) and reused by later runs.
+"""
+import importlib.util
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .common import ROOT
+from .fakes import AUDIO_FEATURES, synthetic_prices
+
+CACHE_DIR = os.getenv("BENCHMARK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "es-os-benchmarks"))
+
+WORDS = ["Midnight", "Golden", "Summer", "Electric", "Broken", "Silver", "Wild", "Lonely", "Neon", "Paper",
+         "Velvet", "Ocean", "Burning", "Hollow", "Crystal", "Shadow", "Sweet", "Falling", "Secret", "Northern",
+         "Heart", "Dream", "River", "City", "Fire", "Rain", "Light", "Road", "Sky", "Love",
+         "Garden", "Echo", "Storm", "Island", "Star", "Mirror", "Highway", "Moon", "Stone", "Letter"]
+
+
+def _cached(name):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+def song_titles(n_songs, seed=0):
+    """Made-up titles of two or three words plus a number, so every title is distinct."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    first = words[rng.integers(0, len(WORDS), n_songs)]
+    second = words[rng.integers(0, len(WORDS), n_songs)]
+    return [f"{a} {b} {number}" for number, (a, b) in enumerate(zip(first, second))]
+
+
+def songs_frame(n_songs, seed=0):
+    """A catalog in the songs.csv layout: name, artist and the Spotify audio features."""
+    rng = np.random.default_rng(seed + 1)
+    frame = pd.DataFrame({"name": song_titles(n_songs, seed), "artist": [f"Artist {number % 5000}" for number in range(n_songs)]})
+    for feature in AUDIO_FEATURES:
+        frame[feature] = rng.random(n_songs).round(4)
+    frame["key"] = rng.integers(0, 12, n_songs)
+    frame["mode"] = rng.integers(0, 2, n_songs)
+    frame["loudness"] = (-20 * frame["loudness"]).round(3)
+    frame["tempo"] = (60 + 120 * frame["tempo"]).round(3)
+    return frame
+
+
+def songs_csv(directory, n_songs, seed=0, name="songs.csv"):
+    """Writes a catalog of `n_songs` songs to `directory`/`name` and returns its path."""
+    path = os.path.join(directory, name)
+    songs_frame(n_songs, seed).to_csv(path, index=False)
+    return path
+
+
+def _docmaker_generator():
+    # Loaded from its file: docmaker's modules are not a package, and its app.py shares
+    # the module name `app` with the other projects
+    path = os.path.join(ROOT, "docureader", "docmaker", "generator.py")
+    spec = importlib.util.spec_from_file_location("docmaker_generator", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def table_pdf(n_rows, seed=0):
+    """The path of a generated hospital table PDF with `n_rows` rows, written on first use."""
+    path = _cached(f"hospitals-{n_rows}-{seed}.pdf")
+    if not os.path.exists(path):
+        generator = _docmaker_generator()
+        temp_path = path + ".part"
+        generator.write_pdf(temp_path, n_rows, seed=seed)
+        os.replace(temp_path, path)
+    return path
+
+
+def prices(n_bars, seed=0):
+    """A price history of `n_bars` bars (Date, Open, High, Low, Close, Volume).
+
+    Daily bars up to 50,000; longer histories are minute bars, since business days
+    from 1990 on run past the last date pandas can represent.
+    """
+    return synthetic_prices(n_bars, seed=seed, freq="B" if n_bars <= 50000 else "min")
+
+
+def price_panel(n_bars, n_symbols, seed=0):
+    """Close prices of `n_symbols` series as a (bars x symbols) array."""
+    return np.column_stack([prices(n_bars, seed=seed + number)["Close"].to_numpy() for number in range(n_symbols)])
@@ -1,7 +1,18 @@
-from flask import Flask, render_template, request, redirect, url_for
-import PyPDF2
+from flask import Flask, render_template, request
+import os
+import sys
+
+# PDF extraction shared with qna-from-doc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from pdf_text import spooled
+from table_parser import iter_rows
+
+# Request timing and /metrics, shared by the backends in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from instrumentation import instrument, stage
 
 app = Flask(__name__)
+instrument(app)
 
 @app.route('/')
 def index():
@@ -17,44 +28,27 @@ def upload_file():
 
     # Only process PDF files
     if file and file.filename.endswith('.pdf'):
-        # Read the PDF file
-        pdf_reader = PyPDF2.PdfReader(file)
-        pdf_text = ""
-        for page in pdf_reader.pages:
-            pdf_text += page.extract_text()
-
-        # Parse the PDF text into rows and columns
-        table_data = parse_pdf_to_table(pdf_text)
+        # Read the table from the word positions in the PDF, page by page
+        try:
+            with spooled(file) as (path, _), stage("table_parse"):
+                table_data = [hospital_row(cells) for cells in iter_rows(path)]
+        except Exception as e:
+            # Empty, truncated or not really a PDF
+            print(f"Error processing PDF: {e}")
+            return "There was an error reading the PDF file. Please upload a valid PDF.", 400
 
         # Render the table data to the template
         return render_template('index.html', table_data=table_data)
     else:
         return "Please upload a PDF file."
 
-def parse_pdf_to_table(pdf_text):
-    # Skipping the document title and column headers
-    lines = pdf_text.strip().split('\n')
-    data_rows = []
-
-    # Start parsing from the actual data (assuming first 2 lines are title/header)
-    for line in lines[2:]:
-        # Split each line based on a pattern (for now, whitespace + numbers + whitespace)
-        columns = line.split()
-
-        # Since each hospital has 5 attributes, validate for correct length
-        if len(columns) >= 6:
-            # Assuming columns follow order:
-            # Hospital Name, Specialization, Address, City, Phone Number, Contact Email
-            name = " ".join(columns[0:2])  # Combine first 2 as Hospital Name
-            specialization = columns[2]
-            address = columns[3]
-            city = columns[4]
-            phone_number = columns[5]
-            contact_email = columns[6]
-
-            data_rows.append([name, specialization, address, city, phone_number, contact_email])
-
-    return data_rows
+def hospital_row(cells):
+    """Maps a row of the generated PDF (name, specialization, address, phone, email) to the
+    table's columns, taking the city from the address ("12, MG Road, Pune, India")."""
+    name, specialization, address, phone_number, contact_email = (cells + [""] * 5)[:5]
+    address_parts = [part.strip() for part in address.split(",")]
+    city = address_parts[-2] if len(address_parts) >= 3 else ""
+    return [name, specialization, address, city, phone_number, contact_email]
 
 if __name__ == "__main__":
     app.run(debug=True)
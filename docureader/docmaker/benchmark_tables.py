@@ -0,0 +1,49 @@
+"""Benchmark of table_parser on a large generated PDF.
+
+Writes a hospital table of `--rows` rows (100,000 by default) with known, seeded
+contents, parses it back with `iter_rows`, and reports throughput and peak memory.
+Every parsed row is compared with the row that was written.
+
+    python benchmark_tables.py --rows 100000
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from generator import generate_rows, merge, write_shards
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from table_parser import iter_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure table extraction speed on a generated PDF.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--pdf", help="where to keep the generated PDF (default: a temporary file); reused if it exists")
+    args = parser.parse_args()
+
+    path = args.pdf or os.path.join(tempfile.gettempdir(), f"benchmark_tables_{args.rows}.pdf")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory() as shard_dir:
+            merge(list(write_shards(shard_dir, args.rows)), path)
+        print(f"Generated {args.rows} rows in {time.perf_counter() - started:.1f}s: {path}")
+
+    started = time.perf_counter()
+    parsed = 0
+    mismatches = 0
+    for expected, row in zip(generate_rows(args.rows), iter_rows(path)):
+        parsed += 1
+        mismatches += row != expected
+    seconds = time.perf_counter() - started
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Parsed {parsed} rows in {seconds:.2f}s ({parsed / seconds:,.0f} rows/s), "
+          f"{mismatches} rows differing from the generated data, peak memory of this process {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
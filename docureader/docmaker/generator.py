@@ -0,0 +1,186 @@
+"""Seeded synthetic hospital tables as PDFs, of any size, for load tests.
+
+Each row is generated on its own from the seed and its row number, so the same seed
+always gives the same table, however it is split into shards. The table is written
+as shards of at most `--rows-per-shard` rows by a pool of worker processes. Each
+shard is rendered a few pages at a time and appended to its file, so a worker only
+holds those pages and memory stays flat as the row count grows.
+`--merge` joins the shards into one PDF afterwards.
+
+    python generator.py --rows 1000000 --seed 0 --out generated --merge hospitals.pdf
+"""
+import argparse
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+from fpdf import FPDF
+
+HOSPITAL_NAMES = [
+    "Apollo Hospital", "Fortis Hospital", "Medanta Medical Center", "Max Super Specialty Hospital",
+    "Narayana Health", "Kokilaben Dhirubhai Ambani Hospital", "Manipal Hospital",
+    "Global Hospital", "Artemis Hospital", "BLK Super Specialty Hospital", "Ruby Hall Clinic",
+    "Breach Candy Hospital", "Sir Ganga Ram Hospital", "Care Hospital", "Sunshine Hospital",
+    "Aster CMI Hospital", "Yashoda Hospital", "Columbia Asia Hospital", "Lotus Hospital",
+    "Metro Hospital"
+]
+SPECIALIZATIONS = [
+    "Cardiology", "Orthopedics", "Neurology", "Oncology", "Pediatrics",
+    "Gastroenterology", "Nephrology", "Gynecology", "Urology", "Pulmonology"
+]
+STREETS = ["Main Street", "Park Avenue", "MG Road", "Station Road"]
+CITIES = ["Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai", "Kolkata", "Pune", "Ahmedabad", "Jaipur", "Lucknow"]
+
+HEADERS = ["Hospital Name", "Specialization", "Address", "Phone Number", "Contact Email"]
+
+# Relative column widths, scaled to the width of the page
+COLUMN_WIDTHS = [62, 30, 75, 32, 68]
+
+PAGE_SIZES = ["A3", "A4", "A5", "Letter", "Legal"]
+
+ROWS_PER_SHARD = 50000
+
+# Pages rendered in memory before they are appended to the PDF file
+BLOCK_PAGES = 40
+
+
+def make_row(number, seed=0):
+    """The row with index `number` of the table for `seed`."""
+    rng = random.Random((seed << 32) | number)
+    name = HOSPITAL_NAMES[number % len(HOSPITAL_NAMES)]
+    return [
+        name,
+        rng.choice(SPECIALIZATIONS),
+        f"{rng.randint(1, 200)}, {rng.choice(STREETS)}, {rng.choice(CITIES)}, India",
+        f"+91-{rng.randint(7000000000, 9999999999)}",
+        f"{name.lower().replace(' ', '')}{number + 1}@example.com",
+    ]
+
+
+def generate_rows(count, seed=0, start=0):
+    """Yields rows `start` to `start + count - 1`, one at a time."""
+    for number in range(start, start + count):
+        yield make_row(number, seed)
+
+
+def _new_pdf(page_size, orientation):
+    pdf = FPDF(orientation=orientation, format=page_size.lower())
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    return pdf
+
+
+def _append(path, pdf):
+    """Adds the pages of `pdf` to the end of the PDF file at `path`, writing only the new objects."""
+    with fitz.open(path) as document, fitz.open("pdf", bytes(pdf.output())) as block:
+        document.insert_pdf(block, links=False, annots=False)
+        document.saveIncr()
+
+
+def write_pdf(path, count, seed=0, start=0, page_size="A4", orientation="L", title=None, block_pages=BLOCK_PAGES):
+    """Writes rows `start` to `start + count - 1` as a table, under one header row, to `path`.
+
+    Rows are rendered `block_pages` pages at a time; each block is appended to the file
+    before the next one starts.
+    """
+    pdf = _new_pdf(page_size, orientation)
+    if title:
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, txt=title, ln=True, align='C')
+        pdf.ln(4)
+
+    scale = (pdf.w - pdf.l_margin - pdf.r_margin) / sum(COLUMN_WIDTHS)
+    widths = [width * scale for width in COLUMN_WIDTHS]
+    # On pages narrower than A4 landscape, the text shrinks with the columns so it still fits
+    size = min(1.0, scale)
+    pdf.set_font("Arial", "B", 10 * size)
+    for header, width in zip(HEADERS, widths):
+        pdf.cell(width, 8 * size, header, border=1)
+    pdf.ln(8 * size)
+    pdf.set_font("Arial", "", 8 * size)
+
+    written = False
+    for row in generate_rows(count, seed, start):
+        if pdf.page >= block_pages and pdf.will_page_break(6 * size):
+            # The block is full: write it out and continue on the first page of a new one
+            if written:
+                _append(path, pdf)
+            else:
+                pdf.output(path)
+                written = True
+            pdf = _new_pdf(page_size, orientation)
+            pdf.set_font("Arial", "", 8 * size)
+        for value, width in zip(row, widths):
+            pdf.cell(width, 6 * size, value, border=1)
+        pdf.ln(6 * size)
+    if written:
+        _append(path, pdf)
+    else:
+        pdf.output(path)
+    return path
+
+
+def _write_shard(arguments):
+    return write_pdf(*arguments)
+
+
+def write_shards(directory, count, seed=0, rows_per_shard=ROWS_PER_SHARD, page_size="A4", orientation="L",
+                 workers=None):
+    """Writes the table as shards `hospitals-00000.pdf`, ... in `directory`, in parallel; yields their paths in order."""
+    os.makedirs(directory, exist_ok=True)
+    shards = [
+        (os.path.join(directory, f"hospitals-{number:05d}.pdf"), min(rows_per_shard, count - start), seed, start,
+         page_size, orientation)
+        for number, start in enumerate(range(0, count, rows_per_shard))
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_write_shard, shards)
+
+
+def merge(paths, path):
+    """Joins the PDFs at `paths` into one PDF at `path`.
+
+    The first shard is copied to `path` and each later one is appended to the file in
+    turn, so only one shard is open at a time.
+    """
+    first, *rest = paths
+    shutil.copyfile(first, path)
+    for shard_path in rest:
+        with fitz.open(path) as merged, fitz.open(shard_path) as shard:
+            merged.insert_pdf(shard, links=False, annots=False)
+            merged.saveIncr()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded hospital table PDF of any size.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page-size", choices=PAGE_SIZES, default="A4")
+    parser.add_argument("--orientation", choices=["L", "P"], default="L", help="landscape or portrait")
+    parser.add_argument("--rows-per-shard", type=int, default=ROWS_PER_SHARD)
+    parser.add_argument("--workers", type=int, help="processes writing shards (default: all cores)")
+    parser.add_argument("--out", default="generated", help="directory for the shards")
+    parser.add_argument("--merge", metavar="PDF", help="join the shards into this file and delete them")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = []
+    for path in write_shards(args.out, args.rows, args.seed, args.rows_per_shard, args.page_size, args.orientation,
+                             args.workers):
+        paths.append(path)
+        print(f"Wrote {path} ({time.perf_counter() - started:.1f}s)")
+    print(f"Generated {args.rows} rows in {len(paths)} shards in {time.perf_counter() - started:.1f}s")
+
+    if args.merge:
+        started = time.perf_counter()
+        merge(paths, args.merge)
+        for path in paths:
+            os.remove(path)
+        print(f"Merged into {args.merge} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Table extraction from PDFs using word positions.
+
+Each page's words come from PyMuPDF with their coordinates. Words the PDF wrote as
+one piece of text (one cell) are kept together as a "run", runs on the same line
+form a row, and the column boundaries are the left edges that runs in most rows of
+the page start at. Every run is placed in the column it starts in, so multi-word
+names and addresses stay in one cell and text overflowing its cell is not split.
+
+Boundaries are found once per page and pages are processed independently (in
+parallel for long documents), so tables of any length are read in bounded memory.
+
+Needs `pdf_text` from ../shared on `sys.path`.
+"""
+from bisect import bisect_right
+from collections import Counter
+
+from pdf_text import map_pages
+
+# Runs whose left edges are this close (in points) are treated as the same column start
+COLUMN_TOLERANCE = 3.0
+
+# A left edge is a column start if runs in at least this fraction of the page's rows start there
+MIN_COLUMN_SUPPORT = 0.5
+
+
+def _runs(words):
+    """Groups words (PyMuPDF "words" tuples, in block/line order) into runs: [x0, y0, y1, text]."""
+    runs = []
+    current_line = None
+    for x0, y0, x1, y1, word, block_number, line_number, _ in words:
+        if (block_number, line_number) == current_line:
+            runs[-1][3] += " " + word
+        else:
+            runs.append([x0, y0, y1, word])
+            current_line = (block_number, line_number)
+    return runs
+
+
+def _rows(runs):
+    """Groups runs into rows by vertical position, each row sorted left to right."""
+    rows = []
+    row_bottom = None
+    for run in sorted(runs, key=lambda run: run[1]):
+        x0, y0, y1, _ = run
+        # A run starting above the middle of the current row belongs to it
+        if rows and y0 < row_bottom - (row_bottom - rows[-1][0][1]) / 2:
+            rows[-1].append(run)
+            row_bottom = max(row_bottom, y1)
+        else:
+            rows.append([run])
+            row_bottom = y1
+    return [sorted(row, key=lambda run: run[0]) for row in rows]
+
+
+def column_starts(rows, tolerance=COLUMN_TOLERANCE, min_support=MIN_COLUMN_SUPPORT):
+    """Left x coordinate of each column, from the rows of one page."""
+    table_rows = [row for row in rows if len(row) > 1]
+    support = Counter()
+    for row in table_rows:
+        support.update({round(run[0]) for run in row})
+    needed = max(1, min_support * len(table_rows))
+    starts = []
+    for x in sorted(x for x, count in support.items() if count >= needed):
+        if not starts or x - starts[-1] > tolerance:
+            starts.append(x)
+    return starts
+
+
+def page_rows(page, tolerance=COLUMN_TOLERANCE, min_support=MIN_COLUMN_SUPPORT):
+    """Returns the table rows on one page as lists of cell strings.
+
+    Lines with a single piece of text (titles, page numbers) are not table rows and
+    are left out.
+    """
+    rows = _rows(_runs(page.get_text("words")))
+    starts = column_starts(rows, tolerance, min_support)
+    if not starts:
+        return []
+    table = []
+    for row in rows:
+        if len(row) < 2:
+            continue
+        cells = [""] * len(starts)
+        for x0, _, _, text in row:
+            column = max(0, bisect_right(starts, x0 + tolerance) - 1)
+            cells[column] = f"{cells[column]} {text}" if cells[column] else text
+        table.append(cells)
+    return table
+
+
+def iter_rows(path, skip_header=True):
+    """Yields the table rows of the PDF at `path`, page by page.
+
+    With `skip_header`, the first row is taken to be the column headers; it and any
+    repeats of it (headers reprinted on later pages) are not yielded.
+    """
+    header = None
+    for rows in map_pages(path, page_rows):
+        for row in rows:
+            if skip_header:
+                if header is None:
+                    header = row
+                    continue
+                if row == header:
+                    continue
+            yield row
@@ -0,0 +1,113 @@
+"""Cache of answers by (document hash, normalized question, model).
+
+Two backends with the same `get`/`set` interface: an in-memory LRU for a single
+process, and SQLite for a cache that survives restarts and is shared by processes
+on the same machine. Entries expire after a TTL and the least recently used ones are
+dropped beyond `max_entries`.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+ANSWER_TTL = int(os.getenv("QNA_ANSWER_TTL", str(7 * 24 * 3600)))
+MAX_ANSWERS = int(os.getenv("QNA_ANSWER_CACHE_SIZE", "10000"))
+
+CACHE_PATH = os.getenv("QNA_ANSWER_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "answers.db"))
+
+
+def normalize_question(question):
+    """Lowercases, collapses whitespace and drops trailing punctuation, so trivial variants share an answer."""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+def answer_key(doc_id, question, model, *settings):
+    """Key of an answer; `settings` are anything else the answer depends on (e.g. top-k)."""
+    parts = [doc_id, normalize_question(question), model] + [str(setting) for setting in settings]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class MemoryAnswerCache:
+    def __init__(self, ttl=ANSWER_TTL, max_entries=MAX_ANSWERS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            answer, created = entry
+            if time.time() - created > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return answer
+
+    def set(self, key, answer):
+        with self.lock:
+            self.entries[key] = (answer, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class SQLiteAnswerCache:
+    def __init__(self, path=CACHE_PATH, ttl=ANSWER_TTL, max_entries=MAX_ANSWERS):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL, "
+                "created REAL NOT NULL, used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS answers_used ON answers (used)")
+
+    def _connection(self):
+        # SQLite connections cannot be shared between threads; keep one per thread
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                connection.execute("DELETE FROM answers WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE answers SET used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key, answer):
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)", (key, answer, now, now))
+            connection.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+def make_answer_cache(backend=None):
+    """Returns the cache selected by `backend` or QNA_ANSWER_CACHE: "memory" (default), "sqlite" or "none"."""
+    backend = backend or os.getenv("QNA_ANSWER_CACHE", "memory")
+    if backend == "memory":
+        return MemoryAnswerCache()
+    if backend == "sqlite":
+        return SQLiteAnswerCache()
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown answer cache backend: {backend}")
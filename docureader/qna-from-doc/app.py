@@ -1,23 +1,58 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-import fitz  # PyMuPDF
+from flask import Flask, render_template, request, redirect, url_for, flash, session, Response, stream_with_context
 from openai import OpenAI
+import json
 import os
+import sys
 from flask_cors import CORS
+from answer_cache import answer_key, make_answer_cache
+from retrieval import TOP_K, ChunkIndex, answer_question, openai_embedder, stream_answer
+
+# doc_store extracts PDFs with the module shared with docmaker
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from doc_store import DocumentStore
+from pdf_text import extract_text
+
+# Request timing and /metrics, shared by the backends in this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from instrumentation import instrument, stage
 
 
 app = Flask(__name__)
 CORS(app)
+instrument(app)
 app.secret_key = "supersecretkey"  # Needed for flashing messages
 
-# Fetch OpenAI API key from environment variable
-api_key = os.getenv("OPENAI_KEY")
-if not api_key:
-    raise ValueError("OpenAI API key not set. Please set the OPENAI_KEY environment variable.")
+if os.getenv("QNA_FAKE_OPENAI") == "1":
+    # Local stand-in for trying the app offline; answers quote the retrieved text
+    from fake_openai import FakeOpenAI
+    client = FakeOpenAI(token_delay=0.02)
+else:
+    # Fetch OpenAI API key from environment variable
+    api_key = os.getenv("OPENAI_KEY")
+    if not api_key:
+        raise ValueError("OpenAI API key not set. Please set the OPENAI_KEY environment variable.")
+
+    client = OpenAI(api_key=api_key)
+
+model = "gpt-4o"
 
-client = OpenAI(api_key=api_key)
+# Number of document chunks sent with each question
+top_k = int(os.getenv("QNA_TOP_K", TOP_K))
 
-# Global variable to store the extracted PDF content
-document_text = ""
+# Rank chunks with embeddings as well as BM25 (one embeddings API call per upload and per question)
+embedder = stage("embeddings")(openai_embedder(client)) if os.getenv("QNA_EMBEDDINGS") == "1" else None
+
+# Uploaded documents (text, page offsets, chunk index) by content hash; each session
+# remembers the ID of the document it uploaded
+documents = DocumentStore(
+    build_index=stage("chunk_index")(lambda text: ChunkIndex.build(text, embed=embedder)),
+    index_name="index-embed" if embedder else "index",
+    extract=stage("pdf_extraction")(extract_text),
+)
+
+# Answers by (document, normalized question, model, retrieval settings); QNA_ANSWER_CACHE
+# selects the backend: memory (default), sqlite or none
+answers = make_answer_cache()
 
 @app.route('/')
 def index():
@@ -25,7 +60,6 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    global document_text
     if 'file' not in request.files:
         flash("No file part in the request.")
         return redirect(url_for('index'))
@@ -38,8 +72,9 @@ def upload_file():
     # Check if the file is a PDF
     if file and file.filename.endswith('.pdf'):
         try:
-            # Read and extract text from the PDF
-            document_text = extract_text_from_pdf(file)
+            # Extract, chunk and index the PDF; a file uploaded before is not processed again
+            document = documents.add_upload(file)
+            session['doc_id'] = document.doc_id
             flash("File uploaded and processed successfully!")
         except Exception as e:
             # Log error and show feedback if extraction fails
@@ -50,43 +85,79 @@ def upload_file():
         flash("Please upload a PDF file.")
         return redirect(url_for('index'))
 
+def find_document():
+    """The document named in the request, or else the one this session uploaded."""
+    return documents.get(request.values.get('doc_id') or session.get('doc_id'))
+
+def cache_key(document, question):
+    return answer_key(document.doc_id, question, model, top_k, documents.index_name)
+
 @app.route('/ask', methods=['POST'])
 def ask_question():
-    global document_text
     question = request.form.get('question')
     if not question:
         flash("Please enter a question.")
         return redirect(url_for('index'))
+    document = find_document()
+    if document is None:
+        flash("Please upload a PDF document first.")
+        return redirect(url_for('index'))
 
-    # Call GPT-4 API with document content and question
-    answer = get_answer_from_gpt4(document_text, question)
+    # Repeated questions about the same document are answered from the cache
+    answer = answers.get(cache_key(document, question)) if answers else None
+    if answer is None:
+        # Call GPT-4 API with the most relevant parts of the document and the question
+        answer = get_answer_from_gpt4(document.index, question)
+        if answers:
+            answers.set(cache_key(document, question), answer)
     return render_template('index.html', question=question, answer=answer)
 
-def extract_text_from_pdf(pdf_file):
-    """Extracts text from a PDF file."""
-    text = ""
-    # Load PDF with PyMuPDF (fitz)
-    with fitz.open(stream=pdf_file.read(), filetype="pdf") as pdf:
-        for page in pdf:
-            text += page.get_text()
-    return text
-
-def get_answer_from_gpt4(document_text, question):
-    """Fetches an answer from GPT-4 based on document content and the question."""
-    messages = [
-        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided document content."},
-        {"role": "user", "content": f"Document content:\n{document_text}\n\nQuestion: {question}"}
-    ]
-
-    # Using the new OpenAI client structure for creating a chat completion
-    completion = client.chat.completions.create(
-        model="gpt-4o",
-        messages=messages
-    )
-
-    # Extract and return the response content directly from the message
-    answer = completion.choices[0].message.content
-    return answer
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/ask/stream', methods=['GET', 'POST'])
+def ask_question_stream():
+    """Like /ask, but sends the answer as Server-Sent Events while the model writes it.
+
+    Emits `token` events with {"text": ...}, then one `done` event with the full
+    answer and whether it came from the cache, or an `error` event.
+    """
+    question = request.values.get('question')
+    if not question:
+        return {"error": "Please enter a question."}, 400
+    document = find_document()
+    if document is None:
+        return {"error": "Please upload a PDF document first."}, 400
+    key = cache_key(document, question)
+
+    def generate():
+        cached = answers.get(key) if answers else None
+        if cached is not None:
+            yield sse("token", {"text": cached})
+            yield sse("done", {"answer": cached, "cached": True})
+            return
+        pieces = []
+        try:
+            with stage("llm_answer_stream"):
+                for piece in stream_answer(client, document.index, question, k=top_k, model=model, embed=embedder):
+                    pieces.append(piece)
+                    yield sse("token", {"text": piece})
+        except Exception as e:
+            print(f"Error answering question: {e}")
+            yield sse("error", {"error": "There was an error answering the question. Please try again."})
+            return
+        answer = "".join(pieces)
+        if answers:
+            answers.set(key, answer)
+        yield sse("done", {"answer": answer, "cached": False})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@stage("llm_answer")
+def get_answer_from_gpt4(document_index, question):
+    """Fetches an answer from GPT-4 based on the top-k document chunks for the question."""
+    return answer_question(client, document_index, question, k=top_k, model=model, embed=embedder)
 
 if __name__ == "__main__":
     app.run(debug=True)
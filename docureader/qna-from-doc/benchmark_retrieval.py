@@ -0,0 +1,71 @@
+"""Benchmark of chunk retrieval against document size, runs offline.
+
+Generates synthetic documents (Zipf-distributed words) of increasing size, builds
+the chunk index for each, and measures index build time, query latency and how much
+text is sent to the model per question compared to sending the whole document.
+Questions are answered by the fake OpenAI client, so no API key is needed.
+
+    python benchmark_retrieval.py --sizes 10000 100000 1000000 --queries 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from fake_openai import FakeOpenAI
+from retrieval import TOP_K, ChunkIndex, answer_question
+
+
+def synthetic_document(n_words, vocabulary_size=50000, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{number}" for number in range(vocabulary_size)])
+    ranks = np.minimum(rng.zipf(1.2, n_words), vocabulary_size) - 1
+    words = vocabulary[ranks]
+    lines = [" ".join(words[start:start + 12]) for start in range(0, n_words, 12)]
+    return "\n".join(lines), words
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure retrieval latency against document size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="document sizes in words")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'words':>10} {'chunks':>8} {'build s':>8} {'load ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'prompt chars':>13} {'full doc chars':>15}")
+    with tempfile.TemporaryDirectory() as index_dir:
+        for n_words in args.sizes:
+            text, words = synthetic_document(n_words)
+
+            path = os.path.join(index_dir, str(n_words))
+            started = time.perf_counter()
+            ChunkIndex.build(text).save(path)
+            build_seconds = time.perf_counter() - started
+
+            # The second upload of the same document loads the saved index
+            started = time.perf_counter()
+            index = ChunkIndex.load(path)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            questions = [" ".join(rng.choice(words, size=rng.integers(3, 7))) for _ in range(args.queries)]
+            latencies = []
+            for question in questions:
+                started = time.perf_counter()
+                index.search(question, args.k)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            client = FakeOpenAI()
+            for question in questions[:20]:
+                answer_question(client, index, question, k=args.k)
+            prompt_chars = [sum(len(message["content"]) for message in prompt) for prompt in client.prompts]
+
+            print(f"{n_words:>10} {len(index):>8} {build_seconds:>8.2f} {load_ms:>8.1f} "
+                  f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} "
+                  f"{int(np.mean(prompt_chars)):>13} {len(text):>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Store of uploaded documents, keyed by a hash of the PDF file.
+
+Each document holds its extracted text, the offset where each page starts and its
+chunk index. Documents live on disk under STORE_DIR, one directory per hash, and the
+most recently used ones are also kept in memory up to a size limit. Sessions refer
+to a document by its ID (the hash), so users do not overwrite each other's
+documents, and uploading a file that was seen before skips extraction and indexing.
+"""
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict, namedtuple
+
+from pdf_text import extract_text, spooled
+from retrieval import ChunkIndex
+
+STORE_DIR = os.getenv("QNA_DOCUMENT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "documents"))
+
+# Approximate memory budget for documents kept in memory
+MAX_MEMORY_BYTES = int(os.getenv("QNA_DOCUMENT_MEMORY_MB", "512")) * 1024 * 1024
+
+Document = namedtuple('Document', ['doc_id', 'text', 'page_offsets', 'index'])
+
+
+def _size(document):
+    arrays = (document.index.offsets, document.index.postings, document.index.frequencies, document.index.lengths)
+    size = len(document.text) + sum(len(chunk) for chunk in document.index.chunks) + sum(array.nbytes for array in arrays)
+    if document.index.embeddings is not None:
+        size += document.index.embeddings.nbytes
+    return size
+
+
+class DocumentStore:
+    """Documents by ID: an in-memory LRU bounded by `max_bytes`, backed by one directory per document.
+
+    `extract(path)` returns the (text, page offsets) of a new PDF and `build_index(text)`
+    makes its chunk index; `index_name` names the saved index, so indexes built with
+    different settings do not mix.
+    """
+
+    def __init__(self, build_index=ChunkIndex.build, index_name="index", root=STORE_DIR, max_bytes=MAX_MEMORY_BYTES,
+                 extract=extract_text):
+        self.extract = extract
+        self.build_index = build_index
+        self.index_name = index_name
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        # One lock per document being added, so concurrent uploads of a new file extract it once
+        self.adding = {}
+
+    def _remember(self, document):
+        with self.lock:
+            if document.doc_id in self.memory:
+                self.memory.move_to_end(document.doc_id)
+                return
+            self.memory[document.doc_id] = document
+            self.memory_bytes += _size(document)
+            while self.memory_bytes > self.max_bytes and len(self.memory) > 1:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_bytes -= _size(evicted)
+
+    def _load(self, doc_id):
+        path = os.path.join(self.root, doc_id)
+        try:
+            with open(os.path.join(path, "text.txt"), encoding="utf-8") as text_file:
+                text = text_file.read()
+            with open(os.path.join(path, "pages.json")) as pages_file:
+                page_offsets = json.load(pages_file)
+        except (OSError, ValueError):
+            return None
+        index_path = os.path.join(path, self.index_name)
+        if os.path.exists(index_path + ".json") and os.path.exists(index_path + ".npz"):
+            index = ChunkIndex.load(index_path)
+        else:
+            # Known document, but indexed with other settings
+            index = self.build_index(text)
+            index.save(index_path)
+        return Document(doc_id, text, page_offsets, index)
+
+    def _save(self, document):
+        path = os.path.join(self.root, document.doc_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(temp_path, exist_ok=True)
+        with open(os.path.join(temp_path, "text.txt"), "w", encoding="utf-8") as text_file:
+            text_file.write(document.text)
+        with open(os.path.join(temp_path, "pages.json"), "w") as pages_file:
+            json.dump(document.page_offsets, pages_file)
+        document.index.save(os.path.join(temp_path, self.index_name))
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # Saved by another process in the meantime
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+    def get(self, doc_id):
+        """Returns the Document with this ID, or None if it is unknown."""
+        if not doc_id or not all(char in "0123456789abcdef" for char in doc_id):
+            return None
+        with self.lock:
+            document = self.memory.get(doc_id)
+            if document is not None:
+                self.memory.move_to_end(doc_id)
+                return document
+        document = self._load(doc_id)
+        if document is not None:
+            self._remember(document)
+        return document
+
+    def add_upload(self, upload):
+        """Stores an uploaded PDF and returns its Document. A file seen before is not extracted again."""
+        with spooled(upload) as (path, doc_id):
+            document = self.get(doc_id)
+            if document is not None:
+                return document
+            with self.lock:
+                adding = self.adding.setdefault(doc_id, threading.Lock())
+            with adding:
+                document = self.get(doc_id)
+                if document is None:
+                    text, page_offsets = self.extract(path)
+                    document = Document(doc_id, text, page_offsets, self.build_index(text))
+                    self._save(document)
+                    self._remember(document)
+            with self.lock:
+                self.adding.pop(doc_id, None)
+            return document
@@ -0,0 +1,56 @@
+"""A local stand-in for the OpenAI client, for running the app and benchmarks offline.
+
+Supports `client.chat.completions.create(model=..., messages=..., stream=False|True)`
+and `client.embeddings.create(model=..., input=[...])`, returning objects shaped like
+the real responses. The answer quotes the start of the first document excerpt, so
+it is easy to see which chunks were sent. Start the app with QNA_FAKE_OPENAI=1 to use it.
+"""
+import hashlib
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class FakeOpenAI:
+    """Records every prompt it receives in `prompts`; `token_delay` seconds pass before each streamed token."""
+
+    def __init__(self, token_delay=0.0, latency=0.0, embedding_size=64):
+        self.token_delay = token_delay
+        self.latency = latency
+        self.embedding_size = embedding_size
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+
+    def _answer(self, messages):
+        prompt = messages[-1]["content"]
+        excerpt = prompt.split("[1] ", 1)[-1].split("\n", 1)[0]
+        return f"Based on the document: {excerpt[:200]}"
+
+    def _create_completion(self, model, messages, stream=False, **options):
+        self.prompts.append(messages)
+        time.sleep(self.latency)
+        answer = self._answer(messages)
+        if not stream:
+            message = SimpleNamespace(role="assistant", content=answer)
+            return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+        return self._stream(model, answer)
+
+    def _stream(self, model, answer):
+        for token in answer.split(" "):
+            time.sleep(self.token_delay)
+            delta = SimpleNamespace(content=token + " ")
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+        yield SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=None),
+                                                                    finish_reason="stop")])
+
+    def _create_embeddings(self, model, input, **options):
+        # Deterministic pseudo-embeddings from hashed words, so similar texts get similar vectors
+        data = []
+        for number, text in enumerate(input):
+            vector = np.zeros(self.embedding_size, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.embedding_size] += 1.0
+            data.append(SimpleNamespace(index=number, embedding=vector.tolist()))
+        return SimpleNamespace(model=model, data=data)
@@ -0,0 +1,212 @@
+"""Chunk index for answering questions from the relevant parts of a document only.
+
+An uploaded document is split into overlapping word windows ("chunks") and indexed
+with BM25, and optionally with embeddings. DocumentStore saves the index with the
+document, so it is built once per document. Each question is answered from the
+top-k chunks instead of the whole text.
+
+Nothing here calls an API except the optional embedder, `answer_question` and
+`stream_answer`; all take the client as an argument, so a fake client can be used offline.
+"""
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+
+CHUNK_WORDS = 200
+CHUNK_OVERLAP = 40
+TOP_K = 5
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+SYSTEM_PROMPT = "You are a helpful assistant that answers questions based on provided document content."
+
+_WORD = re.compile(r"\S+")
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _replace(path, write):
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            write(temp_file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def chunk_spans(text, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """Returns (start, end) character offsets of overlapping windows of `chunk_words` words."""
+    words = [match.span() for match in _WORD.finditer(text)]
+    step = max(1, chunk_words - overlap)
+    spans = []
+    for first in range(0, len(words), step):
+        last = min(first + chunk_words, len(words)) - 1
+        spans.append((words[first][0], words[last][1]))
+        if last == len(words) - 1:
+            break
+    return spans
+
+
+def openai_embedder(client, model=EMBEDDING_MODEL, batch_size=256):
+    """Returns a function embedding a list of strings with the OpenAI embeddings API."""
+    def embed(texts):
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            response = client.embeddings.create(model=model, input=texts[start:start + batch_size])
+            vectors.extend(item.embedding for item in response.data)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+    return embed
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class ChunkIndex:
+    """BM25 index (plus optional embedding matrix) over the chunks of one document.
+
+    Postings are stored per term in CSR form: the chunks containing term `t` are
+    `postings[offsets[t]:offsets[t + 1]]`, with their term counts in `frequencies`.
+    """
+
+    def __init__(self, chunks, spans, vocabulary, offsets, postings, frequencies, lengths,
+                 embeddings=None, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.spans = spans
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.lengths = lengths
+        self.embeddings = embeddings
+        self.k1 = k1
+        self.b = b
+        n_chunks = len(chunks)
+        document_frequency = np.diff(offsets)
+        self.idf = np.log(1.0 + (n_chunks - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = lengths.mean() if n_chunks else 1.0
+        self.norms = k1 * (1.0 - b + b * lengths / max(average_length, 1.0))
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @classmethod
+    def build(cls, text, embed=None, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+        spans = chunk_spans(text, chunk_words, overlap)
+        chunks = [text[start:end] for start, end in spans]
+        vocabulary = {}
+        term_ids = []
+        chunk_ids = []
+        lengths = np.zeros(len(chunks), dtype=np.float64)
+        for chunk_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            lengths[chunk_id] = len(tokens)
+            term_ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            chunk_ids.extend([chunk_id] * len(tokens))
+
+        # Count (term, chunk) pairs; sorting by term then chunk gives the CSR layout directly
+        pairs = np.asarray(term_ids, dtype=np.int64) * max(len(chunks), 1) + np.asarray(chunk_ids, dtype=np.int64)
+        pairs, frequencies = np.unique(pairs, return_counts=True)
+        terms = pairs // max(len(chunks), 1)
+        postings = (pairs % max(len(chunks), 1)).astype(np.int32)
+        offsets = np.searchsorted(terms, np.arange(len(vocabulary) + 1)).astype(np.int64)
+
+        embeddings = _normalize(embed(chunks)) if embed and chunks else None
+        return cls(chunks, spans, vocabulary, offsets, postings, frequencies.astype(np.float32), lengths, embeddings)
+
+    def bm25(self, query):
+        """Returns the BM25 score of every chunk for `query`."""
+        scores = np.zeros(len(self.chunks), dtype=np.float64)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            chunk_ids = self.postings[start:end]
+            frequencies = self.frequencies[start:end]
+            scores[chunk_ids] += self.idf[term] * frequencies * (self.k1 + 1.0) / (frequencies + self.norms[chunk_ids])
+        return scores
+
+    def search(self, query, k=TOP_K, embed=None):
+        """Returns the ids of the `k` best chunks for `query`, best first.
+
+        With `embed` and stored embeddings, the BM25 and embedding rankings are merged
+        by reciprocal rank fusion; otherwise BM25 alone decides.
+        """
+        k = min(k, len(self.chunks))
+        if k == 0:
+            return []
+        rankings = [self.bm25(query)]
+        if embed is not None and self.embeddings is not None:
+            rankings.append(self.embeddings @ _normalize(embed([query]))[0])
+        if len(rankings) == 1:
+            scores = rankings[0]
+        else:
+            scores = np.zeros(len(self.chunks))
+            for ranking in rankings:
+                ranks = np.empty(len(ranking))
+                ranks[np.argsort(-ranking, kind="stable")] = np.arange(len(ranking))
+                scores += 1.0 / (60.0 + ranks)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [int(chunk_id) for chunk_id in top[np.argsort(-scores[top], kind="stable")]]
+
+    def save(self, path):
+        """Writes the index to `path`.npz and `path`.json.
+
+        Each file is written under a unique temporary name and then renamed, so concurrent
+        saves never mix their files.
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        arrays = dict(offsets=self.offsets, postings=self.postings, frequencies=self.frequencies, lengths=self.lengths)
+        if self.embeddings is not None:
+            arrays["embeddings"] = self.embeddings
+        meta = {"chunks": self.chunks, "spans": self.spans, "vocabulary": list(self.vocabulary), "k1": self.k1, "b": self.b}
+        _replace(path + ".npz", lambda data_file: np.savez(data_file, **arrays))
+        _replace(path + ".json", lambda meta_file: meta_file.write(json.dumps(meta).encode("utf-8")))
+
+    @classmethod
+    def load(cls, path):
+        with open(path + ".json", encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        with np.load(path + ".npz") as arrays:
+            return cls(meta["chunks"], [tuple(span) for span in meta["spans"]],
+                       {term: term_id for term_id, term in enumerate(meta["vocabulary"])},
+                       arrays["offsets"], arrays["postings"], arrays["frequencies"], arrays["lengths"],
+                       arrays["embeddings"] if "embeddings" in arrays else None, meta["k1"], meta["b"])
+
+
+def build_messages(chunks, question):
+    excerpts = "\n\n".join(f"[{number}] {chunk}" for number, chunk in enumerate(chunks, 1))
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Document excerpts:\n{excerpts}\n\nQuestion: {question}"}
+    ]
+
+
+def _messages(index, question, k, embed):
+    chunks = [index.chunks[chunk_id] for chunk_id in index.search(question, k, embed=embed)]
+    return build_messages(chunks, question)
+
+
+def answer_question(client, index, question, k=TOP_K, model="gpt-4o", embed=None):
+    """Answers `question` from the top-k chunks of `index` with a chat completion."""
+    completion = client.chat.completions.create(model=model, messages=_messages(index, question, k, embed))
+    return completion.choices[0].message.content
+
+
+def stream_answer(client, index, question, k=TOP_K, model="gpt-4o", embed=None):
+    """Like `answer_question`, but yields the answer in pieces as the model produces them."""
+    stream = client.chat.completions.create(model=model, messages=_messages(index, question, k, embed), stream=True)
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
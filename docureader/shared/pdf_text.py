@@ -0,0 +1,144 @@
+"""PDF text extraction shared by the DocuReader apps.
+
+An upload is copied to a temporary file in fixed-size blocks instead of being read
+into memory, then opened through a read-only memory map. Large documents are
+extracted in page ranges by a pool of worker processes, each mapping the same file,
+so the file is read from the OS page cache and never copied between processes.
+Pages come back in order as a generator; `extract_text` joins them once and
+records where each page starts. `map_pages` runs any per-page function the same way.
+
+The apps import this module by adding this directory to `sys.path`.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+SPOOL_BLOCK_SIZE = 1 << 20
+
+# Pages per worker task, and the page count below which extraction stays in-process
+PAGES_PER_TASK = 32
+PARALLEL_MIN_PAGES = 64
+
+WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS)
+        return _pool
+
+
+@contextmanager
+def spooled(upload, suffix=".pdf"):
+    """Copies a file-like upload (or a Werkzeug FileStorage) to a temporary file.
+
+    Yields (path, sha256 hex digest of the content); the digest is computed while copying.
+    """
+    stream = getattr(upload, "stream", upload)
+    digest = hashlib.sha256()
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(handle, "wb") as spool_file:
+            for block in iter(lambda: stream.read(SPOOL_BLOCK_SIZE), b""):
+                digest.update(block)
+                spool_file.write(block)
+        yield path, digest.hexdigest()
+    finally:
+        os.remove(path)
+
+
+@contextmanager
+def open_pdf(path):
+    """Opens the PDF at `path` through a read-only memory map."""
+    with open(path, "rb") as pdf_file:
+        mapped = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        document = fitz.open(stream=view, filetype="pdf")
+        try:
+            yield document
+        finally:
+            document.close()
+    finally:
+        view.release()
+        mapped.close()
+
+
+def page_count(path):
+    with open_pdf(path) as document:
+        return document.page_count
+
+
+def _map_range(path, start, end, task, args):
+    # Runs in a worker process for large documents
+    with open_pdf(path) as document:
+        return [task(document[number], *args) for number in range(start, end)]
+
+
+def map_pages(path, task, *args, pages_per_task=PAGES_PER_TASK):
+    """Yields `task(page, *args)` for every page, in page order.
+
+    `task` must be a module-level function, so it can be sent to worker processes.
+    Documents of PARALLEL_MIN_PAGES pages or more are processed in parallel; only a
+    few page ranges per worker are in flight at a time, so memory stays bounded
+    however long the document is.
+    """
+    total = page_count(path)
+    if total < PARALLEL_MIN_PAGES:
+        yield from _map_range(path, 0, total, task, args)
+        return
+
+    pool = _get_pool()
+    ranges = deque((start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task))
+    in_flight = deque()
+    while ranges and len(in_flight) < 2 * WORKERS:
+        in_flight.append(pool.submit(_map_range, path, *ranges.popleft(), task, args))
+    while in_flight:
+        results = in_flight.popleft().result()
+        if ranges:
+            in_flight.append(pool.submit(_map_range, path, *ranges.popleft(), task, args))
+        yield from results
+
+
+def _page_text(page, sort):
+    return page.get_text(sort=sort)
+
+
+def iter_pages(path, sort=False):
+    """Yields the text of every page in order.
+
+    With `sort=True` text is returned in reading order (top to bottom, left to right),
+    which keeps table rows on one line.
+    """
+    return map_pages(path, _page_text, sort)
+
+
+def extract_text(path, sort=False):
+    """Returns (text, page_offsets): the whole text and the character offset where each page starts.
+
+    `page_offsets` has one entry per page plus the total length, so page `n` is
+    `text[page_offsets[n]:page_offsets[n + 1]]`.
+    """
+    pages = list(iter_pages(path, sort))
+    offsets = [0]
+    for page in pages:
+        offsets.append(offsets[-1] + len(page))
+    return "".join(pages), offsets
+
+
+def extract_upload(upload, sort=False):
+    """Spools an uploaded PDF to disk and returns `extract_text` for it."""
+    with spooled(upload) as (path, _):
+        return extract_text(path, sort)
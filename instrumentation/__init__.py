@@ -0,0 +1,15 @@
+"""Shared timing, metrics and profiling for the Flask backends in this repository.
+
+    from instrumentation import instrument, stage
+
+    instrument(app)              # request timing, /metrics, X-Profile profiling
+
+    @stage("fuzzy_match")        # or: with stage("fuzzy_match"): ...
+    def find_song(...): ...
+
+The backends add the repository root to `sys.path` to import it.
+"""
+from .metrics import REGISTRY, Histogram, Registry
+from .middleware import instrument
+from .profiler import SamplingProfiler
+from .timing import stage
@@ -0,0 +1,81 @@
+"""Latency histograms rendered in the Prometheus text exposition format.
+
+Histograms live in a `Registry` (the process-wide one is `REGISTRY`) and are kept
+per combination of label values. Each process keeps its own numbers, so with several
+worker processes every worker reports separately.
+"""
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds, from sub-millisecond cache hits to multi-second model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, like a Prometheus histogram.
+
+    `observe(seconds, **labels)` takes one keyword per name in `label_names`.
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        slot = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {key: list(values) for key, values in self.series.items()}
+        for key, values in sorted(series.items()):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-1]!r}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return "\n".join(lines)
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Returns the histogram called `name`, creating it the first time."""
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(name, documentation, label_names, buckets)
+            return self.histograms[name]
+
+    def render(self):
+        with self.lock:
+            histograms = list(self.histograms.values())
+        return "\n".join(histogram.render() for histogram in histograms) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,117 @@
+"""Request timing, a /metrics endpoint and per-request profiling for Flask apps.
+
+`instrument(app)` times every request into the `http_request_duration_seconds`
+histogram (by method, route and status), until the response is closed, so
+streamed responses are timed to their end. It also adds a Server-Timing header
+listing the stages the request ran, and these routes:
+
+- `/metrics`: all histograms, in the Prometheus text format.
+- `/metrics/profiles/<id>`: a request profile, as collapsed stacks.
+
+A request sent with an `X-Profile` header is profiled by a `SamplingProfiler`.
+Its response carries an `X-Profile-Id` header naming the profile, which can be
+fetched once the response has been sent. The header value must match
+PROFILE_TOKEN; without a token, profiling is off unless the app runs in debug
+mode, where any value will do. Requests without the header pay for one header lookup.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import Response, abort, g, request
+
+from .metrics import CONTENT_TYPE, REGISTRY
+from .profiler import SamplingProfiler
+from .timing import collect_stages, stop_collecting
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+
+# Finished profiles kept for /metrics/profiles/<id>
+PROFILE_HISTORY = 20
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time from the start of a request until its response is closed.",
+    ["method", "endpoint", "status"],
+)
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def _keep_profile(profile_id, profiler):
+    with _profiles_lock:
+        _profiles[profile_id] = profiler
+        while len(_profiles) > PROFILE_HISTORY:
+            _profiles.popitem(last=False)
+
+
+def _finish(started, labels, profile_id, profiler):
+    """Records the request once its response is closed; `request` is no longer available here."""
+    def finish():
+        REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+        if profiler is not None:
+            _keep_profile(profile_id, profiler.stop())
+    return finish
+
+
+def instrument(app):
+    """Adds request timing, profiling and the /metrics routes to `app`. Returns `app`."""
+
+    @app.before_request
+    def start_request_timing():
+        g.instrumentation_started = time.perf_counter()
+        g.instrumentation_stages = collect_stages()
+        token = request.headers.get(PROFILE_HEADER)
+        if token and (token == PROFILE_TOKEN if PROFILE_TOKEN else app.debug):
+            g.instrumentation_profiler = SamplingProfiler().start()
+
+    @app.after_request
+    def finish_request_timing(response):
+        started = g.pop("instrumentation_started", None)
+        if started is None:
+            return response
+        # A stage run several times (e.g. once per seed) is listed once, with its total time
+        totals = {}
+        for name, seconds in g.instrumentation_stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        timings = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+        timings.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(timings)
+
+        profiler = g.pop("instrumentation_profiler", None)
+        profile_id = uuid.uuid4().hex if profiler is not None else None
+        if profiler is not None:
+            response.headers["X-Profile-Id"] = profile_id
+        endpoint = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        labels = dict(method=request.method, endpoint=endpoint, status=response.status_code)
+        response.call_on_close(_finish(started, labels, profile_id, profiler))
+        return response
+
+    @app.teardown_request
+    def stop_request_timing(error):
+        stop_collecting()
+        # after_request does not run when the view raised; record the request as a 500
+        started = g.pop("instrumentation_started", None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint, status=500)
+            profiler = g.pop("instrumentation_profiler", None)
+            if profiler is not None:
+                profiler.stop()
+
+    def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    def profile(profile_id):
+        with _profiles_lock:
+            profiler = _profiles.get(profile_id)
+        if profiler is None:
+            abort(404)
+        return Response(profiler.collapsed(), content_type="text/plain; charset=utf-8")
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+    app.add_url_rule("/metrics/profiles/<profile_id>", "metrics_profile", profile)
+    return app
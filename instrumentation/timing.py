@@ -0,0 +1,84 @@
+"""Stage timers: how long named steps (PDF extraction, model calls, ...) take.
+
+    with stage("pdf_extraction"):
+        text = extract(path)
+
+    @stage("llm_answer")
+    def answer(question): ...
+
+Every timing goes into the `stage_duration_seconds` histogram. While a request is
+being handled by an instrumented Flask app, the stages it ran are also collected
+for its Server-Timing header (see `middleware.instrument`).
+"""
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+
+from .metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram("stage_duration_seconds", "Time spent in instrumented stages.", ["stage"])
+
+# (stage, seconds) pairs of the request being handled, or None outside requests
+_request_stages = ContextVar("request_stages", default=None)
+
+
+def collect_stages():
+    """Starts collecting the stages run in the current context into the returned list."""
+    stages = []
+    _request_stages.set(stages)
+    return stages
+
+
+def stop_collecting():
+    _request_stages.set(None)
+
+
+def _record(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+class stage:
+    """Times a block (as a context manager) or every call of a function (as a decorator).
+
+    Decorated generator functions are timed from the first item until they finish or
+    are closed, and coroutine functions until they return.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _record(self.name, time.perf_counter() - self.started)
+
+    def __call__(self, function):
+        name = self.name
+        # A new stage per call, so one decorated function can run in several threads at once
+        if inspect.isasyncgenfunction(function):
+            raise TypeError("stage() does not time async generators")
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_coroutine(*args, **kwargs):
+                with stage(name):
+                    return await function(*args, **kwargs)
+            return timed_coroutine
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def timed_generator(*args, **kwargs):
+                with stage(name):
+                    yield from function(*args, **kwargs)
+            return timed_generator
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return timed